@@ -1,7 +1,16 @@
+import collections
+
 import pydot
 from jax._src import core as jax_core
 
-from . import graph, utils
+from . import graph, graph_utils, utils, writer
+
+# Subgraphs most recently drawn, keyed by the jaxpr, function
+# name and drawing options. A copy of the graph is only kept
+# once a function has been drawn twice (functions drawn once
+# map to `None`), and only the last few entries are kept.
+_DRAWN_SUBGRAPHS = collections.OrderedDict()
+_MAX_DRAWN_SUBGRAPHS = 8
 
 
 def draw_dot_graph(
@@ -10,6 +19,10 @@ def draw_dot_graph(
     """
     Generate a pydot representation of an XLA graph
 
+    If the function has already been drawn more than once
+    with the same options, a copy of the previously generated
+    graph is returned.
+
     Parameters
     ----------
     fn : ClosedJaxpr
@@ -25,14 +38,42 @@ def draw_dot_graph(
         Pydot graph
     """
 
-    g = pydot.Dot(graph_type="digraph")
+    g = writer.DotGraph(graph_type="digraph")
+    eqn = fn.eqns[0]
+    key = None
+
+    if utils.is_not_primitive(eqn):
+        key = (
+            eqn.params["jaxpr"].jaxpr,
+            eqn.params["name"],
+            collapse_primitives,
+            show_avals,
+        )
+        if _DRAWN_SUBGRAPHS.get(key) is not None:
+            _DRAWN_SUBGRAPHS.move_to_end(key)
+            sub_graph, _ = graph_utils.clone_subgraph(_DRAWN_SUBGRAPHS[key], None, [])
+            graph_utils.add_subgraph(g, sub_graph)
+            graph_utils.set_parent_graph(sub_graph, g.get_parent_graph())
+            return g
+
     id_map = utils.IdMap()
-    sub_graph, _, _, _, _ = graph.get_sub_graph(
-        fn.eqns[0], "", 0, collapse_primitives, show_avals, id_map
-    )
-    if isinstance(sub_graph, pydot.Subgraph):
-        g.add_subgraph(sub_graph)
+    result = graph.get_sub_graph(eqn, "", 0, collapse_primitives, show_avals, id_map)
+    if result.is_subgraph:
+        graph_utils.add_subgraph(g, result.graph)
+        graph_utils.set_parent_graph(result.graph, g.get_parent_graph())
+        if key is not None:
+            if key in _DRAWN_SUBGRAPHS:
+                # Keep a copy (detached from the returned graph) of
+                # functions that are drawn repeatedly
+                template, _ = graph_utils.clone_subgraph(result.graph, None, [])
+                graph_utils.set_parent_graph(template, None)
+                _DRAWN_SUBGRAPHS[key] = template
+                _DRAWN_SUBGRAPHS.move_to_end(key)
+            else:
+                _DRAWN_SUBGRAPHS[key] = None
+            if len(_DRAWN_SUBGRAPHS) > _MAX_DRAWN_SUBGRAPHS:
+                _DRAWN_SUBGRAPHS.popitem(last=False)
     else:
-        g.add_node(sub_graph)
+        g.add_node(result.graph)
 
     return g
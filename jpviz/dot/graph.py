@@ -1,4 +1,6 @@
 # flake8: noqa: C901
+import collections
+import types
 import typing
 
 import jax._src.core as jax_core
@@ -6,13 +8,28 @@ import pydot
 
 from . import graph_utils, styling, utils
 
-sub_graph_return = typing.Tuple[
-    typing.Union[pydot.Node, pydot.Subgraph],
-    typing.List[pydot.Edge],
-    typing.List[pydot.Node],
-    typing.List[pydot.Edge],
-    int,
-]
+
+class SubGraphResult(typing.NamedTuple):
+    """
+    Node or subgraph generated from a JaxprEqn, and the
+    nodes and edges connecting it to its parent graph
+    """
+
+    graph: typing.Union[pydot.Node, pydot.Subgraph]
+    is_subgraph: bool
+    in_edges: typing.List[pydot.Edge]
+    out_nodes: typing.List[pydot.Node]
+    out_edges: typing.List[pydot.Edge]
+    n: int
+
+
+# Builders yield (eqn, parent_id, n) for each sub-eqn they need
+# expanded, and are sent back the corresponding SubGraphResult
+child_request = typing.Tuple[jax_core.JaxprEqn, str, int]
+sub_graph_builder = typing.Generator[child_request, SubGraphResult, SubGraphResult]
+# Previously generated subgraphs and their ids, keyed by
+# the id of their jaxpr (and any parameters of the drawing)
+subgraph_cache_type = typing.Dict[typing.Hashable, typing.Tuple[pydot.Subgraph, str]]
 
 
 def get_conditional(
@@ -22,10 +39,14 @@ def get_conditional(
     collapse_primitives: bool,
     show_avals: bool,
     id_map: utils.IdMap,
-) -> sub_graph_return:
+    subgraph_cache: subgraph_cache_type,
+) -> sub_graph_builder:
     """
     Generate a subgraph representing a conditional function
 
+    Branches that have already been expanded (as the same
+    branch of a conditional) are copied rather than rebuilt.
+
     Parameters
     ----------
     conditional: jax._src.core.Jaxpr
@@ -43,107 +64,93 @@ def get_conditional(
         as new nodes are added
     id_map: IdMap
         Node id to label map
+    subgraph_cache: dict
+        Map from jaxpr ids to previously generated subgraphs
+        and their ids
 
     Returns
     -------
-    (
-        typing.Union[pydot.Node, pydot.Subgraph],
-        typing.List[pydot.Edge],
-        typing.List[pydot.Node],
-        typing.List[pydot.Edge],
-        int
-    )
-        Tuple containing:
-            - Subgraph representing the conditional function and branches
-            - List of edges that will connect a parent graph to the
-              arguments of the conditional function
-            - List of nodes that should be added to a parent graph (i.e.
-              outputs of this graph)
-            - List of edges connecting the outputs of this graph to
-              parent graph
-            - Updated incremented integer used to get unique node ids
+    sub_graph_builder
+        Generator that yields the sub-eqns it requires to be
+        expanded (and is sent the corresponding results), and
+        returns the `SubGraphResult` of the conditional subgraph
     """
 
     cond_graph_id = f"{parent_id}_cond_{n}"
+    parent_prefix = f"{parent_id}_"
+    cond_prefix = f"{cond_graph_id}_"
     cond_graph = graph_utils.get_subgraph(f"cluster_{cond_graph_id}", "switch")
     n = n + 1
 
     cond_node_id = f"{cond_graph_id}_node"
-    cond_arguments = pydot.Subgraph(f"{cond_graph_id}_inputs", rank="same")
-    cond_arguments.add_node(
-        pydot.Node(name=cond_node_id, label="idx", **styling.COND_NODE_STYLING)
+    cond_arguments = graph_utils.new_subgraph(
+        f"{cond_graph_id}_inputs", {"rank": "same"}
     )
+    cond_nodes = [graph_utils.new_node(cond_node_id, "idx", styling.COND_NODE_STYLING)]
 
-    in_edges = list()
-    new_nodes = list()
+    cond_var = conditional.invars[0]
+    cond_var_id = parent_prefix + str(id(cond_var))
+    new_nodes = _get_literal_nodes([cond_var], parent_prefix, show_avals, id_map)
+    in_edges = [graph_utils.new_edge(cond_var_id, cond_node_id)]
     out_edges = list()
 
-    cond_var = conditional.invars[0]
-    cond_var_id = f"{parent_id}_{id(cond_var)}"
-    if isinstance(cond_var, jax_core.Literal):
-        new_nodes.append(
-            graph_utils.get_arg_node(cond_var_id, cond_var, show_avals, True, id_map)
-        )
-    in_edges.append(pydot.Edge(cond_var_id, cond_node_id))
+    cond_args = conditional.invars[1:]
+    cond_arg_ids = [cond_prefix + str(id(arg)) for arg in cond_args]
+    cond_out_ids = [cond_prefix + str(id(var)) for var in conditional.outvars]
 
-    for arg in conditional.invars[1:]:
-        arg_id = f"{cond_graph_id}_{id(arg)}"
+    for arg, arg_id in zip(cond_args, cond_arg_ids):
         is_literal = isinstance(arg, jax_core.Literal)
-        cond_arguments.add_node(
+        cond_nodes.append(
             graph_utils.get_arg_node(arg_id, arg, show_avals, is_literal, id_map)
         )
-        in_edges.append(pydot.Edge(f"{parent_id}_{id(arg)}", arg_id))
+        # Literal arguments are drawn in the argument group, so
+        # are not connected to the parent graph
+        if not is_literal:
+            in_edges.append(graph_utils.new_edge(parent_prefix + str(id(arg)), arg_id))
 
-    cond_graph.add_subgraph(cond_arguments)
+    graph_utils.bulk_add(cond_arguments, cond_nodes, [])
+    graph_utils.add_subgraph(cond_graph, cond_arguments)
 
     for i, branch in enumerate(conditional.params["branches"]):
+        branch_graph_id = f"{cond_node_id}_branch_{i}"
+        # Unused (dropped) arguments are not drawn
+        branch_args = [
+            (var, p_var_id)
+            for var, p_var_id in zip(branch.jaxpr.invars, cond_arg_ids)
+            if not isinstance(var, jax_core.DropVar)
+        ]
+
         if len(branch.eqns) == 0:
-            branch_graph_id = f"{cond_node_id}_branch_{i}"
             label = f"branch {i}"
 
             if collapse_primitives:
-                cond_graph.add_node(
-                    pydot.Node(
-                        name=branch_graph_id,
-                        label=label,
-                        **styling.FUNCTION_NODE_STYLING,
-                    )
+                branch_node, branch_in, branch_out = graph_utils.get_collapsed_node(
+                    branch_graph_id,
+                    label,
+                    [p_var_id for _, p_var_id in branch_args],
+                    cond_out_ids,
                 )
-
-                for (var, p_var) in zip(branch.jaxpr.invars, conditional.invars[1:]):
-                    # TODO: What does the underscore mean?
-                    if str(var)[-1] == "_":
-                        continue
-                    cond_graph.add_edge(
-                        pydot.Edge(f"{cond_graph_id}_{id(p_var)}", branch_graph_id)
-                    )
-                for var in conditional.outvars:
-                    cond_graph.add_edge(
-                        pydot.Edge(branch_graph_id, f"{cond_graph_id}_{id(var)}")
-                    )
+                graph_utils.bulk_add(cond_graph, [branch_node], branch_in + branch_out)
             else:
                 branch_graph = graph_utils.get_subgraph(
                     f"cluster_{branch_graph_id}", label
                 )
-                for (var, p_var) in zip(branch.jaxpr.invars, conditional.invars[1:]):
-                    # TODO: What does the underscore mean?
-                    if str(var)[-1] == "_":
-                        continue
-                    arg_id = f"{branch_graph_id}_{id(var)}"
-                    branch_graph.add_node(
+                branch_prefix = f"{branch_graph_id}_"
+                branch_nodes = list()
+                branch_edges = list()
+                for var, p_var_id in branch_args:
+                    arg_id = branch_prefix + str(id(var))
+                    branch_nodes.append(
                         graph_utils.get_var_node(arg_id, var, show_avals, id_map)
                     )
-                    cond_graph.add_edge(
-                        pydot.Edge(f"{cond_graph_id}_{id(p_var)}", arg_id)
-                    )
-                for var, c_var in zip(branch.jaxpr.outvars, conditional.outvars):
-                    arg_id = f"{branch_graph_id}_{id(var)}"
-                    cond_graph.add_edge(
-                        pydot.Edge(arg_id, f"{cond_graph_id}_{id(c_var)}")
-                    )
-                cond_graph.add_subgraph(branch_graph)
+                    branch_edges.append(graph_utils.new_edge(p_var_id, arg_id))
+                for var, c_var_id in zip(branch.jaxpr.outvars, cond_out_ids):
+                    arg_id = branch_prefix + str(id(var))
+                    branch_edges.append(graph_utils.new_edge(arg_id, c_var_id))
+                graph_utils.bulk_add(branch_graph, branch_nodes, [])
+                graph_utils.bulk_add(cond_graph, [], branch_edges)
+                graph_utils.add_subgraph(cond_graph, branch_graph)
         else:
-            branch_graph_id = f"{cond_node_id}_branch_{i}"
             if len(branch.eqns) == 1:
                 eqn = branch.eqns[0]
                 branch_label = (
@@ -161,7 +168,34 @@ def get_conditional(
                 branch_label = f"branch {i}"
                 collapse_branch = collapse_primitives
 
-            if utils.contains_non_primitives(branch.eqns) or not collapse_branch:
+            cache_key = (id(branch), i)
+
+            if cache_key in subgraph_cache:
+                # The branch has already been expanded, so copy that subgraph
+                # and connect it to the arguments/outputs of this conditional
+                template, template_id = subgraph_cache[cache_key]
+                arg_edges = graph_utils.get_argument_edges(
+                    template_id, cond_graph_id, branch.jaxpr.invars, cond_args
+                )
+                branch_out_edges, branch_out_nodes = graph_utils.get_output_edges(
+                    template_id,
+                    cond_graph_id,
+                    branch.jaxpr.invars,
+                    branch.jaxpr.outvars,
+                    conditional.outvars,
+                    show_avals,
+                    id_map,
+                )
+                branch_graph, arg_edges, branch_out_edges = _clone_cached(
+                    template, cond_graph_id, arg_edges, branch_out_edges
+                )
+                graph_utils.bulk_add(
+                    cond_graph, branch_out_nodes, arg_edges + branch_out_edges
+                )
+                graph_utils.add_subgraph(cond_graph, branch_graph)
+            elif not collapse_branch or utils.contains_non_primitives_jaxpr(
+                branch.jaxpr
+            ):
                 branch_graph = graph_utils.get_subgraph(
                     f"cluster_{branch_graph_id}", branch_label
                 )
@@ -170,39 +204,29 @@ def get_conditional(
                     cond_graph_id,
                     branch.jaxpr.constvars,
                     branch.jaxpr.invars,
-                    conditional.invars[1:],
+                    cond_args,
                     show_avals,
                     id_map,
                 )
-                for edge in arg_edges:
-                    cond_graph.add_edge(edge)
-                branch_graph.add_subgraph(branch_args)
+                graph_utils.add_subgraph(branch_graph, branch_args)
 
                 for eqn in branch.eqns:
+                    eqn_result = yield eqn, branch_graph_id, n
                     (
                         eqn_graph,
+                        eqn_is_subgraph,
                         eqn_in_edges,
                         eqn_out_nodes,
                         eqn_out_edges,
                         n,
-                    ) = get_sub_graph(
-                        eqn,
-                        branch_graph_id,
-                        n,
-                        collapse_primitives,
-                        show_avals,
-                        id_map,
-                    )
-                    if isinstance(eqn_graph, pydot.Subgraph):
-                        branch_graph.add_subgraph(eqn_graph)
+                    ) = eqn_result
+                    if eqn_is_subgraph:
+                        graph_utils.add_subgraph(branch_graph, eqn_graph)
                     else:
                         branch_graph.add_node(eqn_graph)
-                    for edge in eqn_in_edges:
-                        branch_graph.add_edge(edge)
-                    for node in eqn_out_nodes:
-                        branch_graph.add_node(node)
-                    for edge in eqn_out_edges:
-                        branch_graph.add_edge(edge)
+                    graph_utils.bulk_add(
+                        branch_graph, eqn_out_nodes, eqn_in_edges + eqn_out_edges
+                    )
 
                 (
                     branch_out_graph,
@@ -218,38 +242,22 @@ def get_conditional(
                     show_avals,
                     id_map,
                 )
-                branch_graph.add_subgraph(branch_out_graph)
-                for edge in branch_out_edges:
-                    cond_graph.add_edge(edge)
-                for node in branch_out_nodes:
-                    cond_graph.add_node(node)
-                for edge in id_edges:
-                    branch_graph.add_edge(edge)
-
-                cond_graph.add_subgraph(branch_graph)
-            else:
-                cond_graph.add_node(
-                    pydot.Node(
-                        name=branch_graph_id,
-                        label=branch_label,
-                        **styling.FUNCTION_NODE_STYLING,
-                    )
+                graph_utils.add_subgraph(branch_graph, branch_out_graph)
+                graph_utils.bulk_add(branch_graph, [], id_edges)
+                graph_utils.bulk_add(
+                    cond_graph, branch_out_nodes, arg_edges + branch_out_edges
                 )
-                for (var, p_var) in zip(branch.jaxpr.invars, conditional.invars[1:]):
-                    # TODO: What does the underscore mean?
-
-                    if str(var)[-1] == "_":
-                        continue
 
-                    if not is_literal:
-                        cond_graph.add_edge(
-                            pydot.Edge(f"{cond_graph_id}_{id(p_var)}", branch_graph_id)
-                        )
-
-                for var in conditional.outvars:
-                    cond_graph.add_edge(
-                        pydot.Edge(branch_graph_id, f"{cond_graph_id}_{id(var)}")
-                    )
+                graph_utils.add_subgraph(cond_graph, branch_graph)
+                subgraph_cache[cache_key] = (branch_graph, branch_graph_id)
+            else:
+                branch_node, branch_in, branch_out = graph_utils.get_collapsed_node(
+                    branch_graph_id,
+                    branch_label,
+                    [p_var_id for _, p_var_id in branch_args],
+                    cond_out_ids,
+                )
+                graph_utils.bulk_add(cond_graph, [branch_node], branch_in + branch_out)
 
     cond_out_graph, cond_out_edges, cond_out_nodes, _ = graph_utils.get_outputs(
         cond_graph_id,
@@ -260,11 +268,52 @@ def get_conditional(
         show_avals,
         id_map,
     )
-    cond_graph.add_subgraph(cond_out_graph)
+    graph_utils.add_subgraph(cond_graph, cond_out_graph)
     out_edges.extend(cond_out_edges)
     new_nodes.extend(cond_out_nodes)
 
-    return cond_graph, in_edges, new_nodes, out_edges, n
+    return SubGraphResult(cond_graph, True, in_edges, new_nodes, out_edges, n)
+
+
+def _get_literal_nodes(
+    invars: typing.List[typing.Union[jax_core.Var, jax_core.Literal]],
+    graph_prefix: str,
+    show_avals: bool,
+    id_map: utils.IdMap,
+) -> typing.List[pydot.Node]:
+    """
+    Generate nodes for the literal arguments of an eqn that have
+    not already been drawn in the graph containing the eqn
+
+    Literals used by several eqns are only drawn once per graph.
+
+    Parameters
+    ----------
+    invars: List[jax._src.core.Var | jax._src.core.Literal]
+        Input variables of the eqn
+    graph_prefix: str
+        Prefix of node ids in the graph containing the eqn
+    show_avals: bool
+        If `True` the type of the data is shown on the nodes
+    id_map: IdMap
+        Node id to label map
+
+    Returns
+    -------
+    List[pydot.Node]
+        Literal nodes to be added to the graph containing the eqn
+    """
+    literal_nodes = list()
+    for var in invars:
+        if not isinstance(var, jax_core.Literal):
+            continue
+        var_id = graph_prefix + str(id(var))
+        if var_id not in id_map.literal_ids:
+            id_map.literal_ids.add(var_id)
+            literal_nodes.append(
+                graph_utils.get_arg_node(var_id, var, show_avals, True, id_map)
+            )
+    return literal_nodes
 
 
 def _get_node(
@@ -274,7 +323,7 @@ def _get_node(
     n: int,
     is_primitive: bool,
     id_map: utils.IdMap,
-) -> sub_graph_return:
+) -> SubGraphResult:
     """
     Generate a node representing a function and edges connecting it
     to a parent graph
@@ -298,22 +347,9 @@ def _get_node(
 
     Returns
     -------
-    (
-        typing.Union[pydot.Node, pydot.Subgraph],
-        typing.List[pydot.Edge],
-        typing.List[pydot.Node],
-        typing.List[pydot.Edge],
-        int
-    )
-        Tuple containing:
-            - Node representing the function
-            - List of edges that will connect a parent graph to the
-              arguments of the function
-            - List of nodes that should be added to a parent graph (i.e.
-              outputs of this graph)
-            - List of edges connecting the outputs of this node to
-              parent graph
-            - Updated incremented integer used to get unique node ids
+    SubGraphResult
+        Node representing the function, and the nodes and
+        edges connecting it to its parent graph
     """
 
     name = str(eqn.primitive) if is_primitive else eqn.params["name"]
@@ -321,27 +357,55 @@ def _get_node(
     n = n + 1
 
     style = styling.PRIMITIVE_STYLING if is_primitive else styling.FUNCTION_NODE_STYLING
-    node = pydot.Node(name=node_id, label=name, **style)
+    node = graph_utils.new_node(node_id, name, style)
 
-    new_nodes = list()
-    in_edges = list()
-    out_edges = list()
+    graph_prefix = f"{graph_id}_"
+    in_ids = [graph_prefix + str(id(var)) for var in eqn.invars]
+    out_ids = [graph_prefix + str(id(var)) for var in eqn.outvars]
 
-    for var in eqn.invars:
-        if isinstance(var, jax_core.Literal):
-            new_nodes.append(
-                graph_utils.get_arg_node(
-                    f"{graph_id}_{id(var)}", var, show_avals, True, id_map
-                )
-            )
-        in_edges.append(pydot.Edge(f"{graph_id}_{id(var)}", node_id))
+    new_nodes = _get_literal_nodes(eqn.invars, graph_prefix, show_avals, id_map)
+    new_nodes.extend(
+        graph_utils.get_var_node(var_id, var, show_avals, id_map)
+        for var, var_id in zip(eqn.outvars, out_ids)
+    )
+    in_edges = [graph_utils.new_edge(var_id, node_id) for var_id in in_ids]
+    out_edges = [graph_utils.new_edge(node_id, var_id) for var_id in out_ids]
+
+    return SubGraphResult(node, False, in_edges, new_nodes, out_edges, n)
+
+
+def _clone_cached(
+    template: pydot.Subgraph,
+    graph_id: str,
+    argument_edges: typing.List[pydot.Edge],
+    out_edges: typing.List[pydot.Edge],
+) -> typing.Tuple[pydot.Subgraph, typing.List[pydot.Edge], typing.List[pydot.Edge]]:
+    """
+    Copy a cached subgraph along with the edges connecting it to its parent
 
-    for var in eqn.outvars:
-        var_id = f"{graph_id}_{id(var)}"
-        new_nodes.append(graph_utils.get_var_node(var_id, var, show_avals, id_map))
-        out_edges.append(pydot.Edge(node_id, var_id))
+    Parameters
+    ----------
+    template: pydot.Subgraph
+        Previously generated subgraph
+    graph_id: str
+        Unique ID used to rename the contents of the copy
+    argument_edges: List[pydot.Edge]
+        Edges connecting the parent graph to the
+        arguments of the template
+    out_edges: List[pydot.Edge]
+        Edges connecting the outputs of the
+        template to the parent graph
 
-    return node, in_edges, new_nodes, out_edges, n
+    Returns
+    -------
+    (pydot.Subgraph, List[pydot.Edge], List[pydot.Edge])
+        The copied subgraph, and the argument and output
+        edges connected to the copy
+    """
+    graph, edges = graph_utils.clone_subgraph(
+        template, graph_id, argument_edges + out_edges
+    )
+    return graph, edges[: len(argument_edges)], edges[len(argument_edges) :]
 
 
 def expand_non_primitive(
@@ -351,10 +415,14 @@ def expand_non_primitive(
     collapse_primitives: bool,
     show_avals: bool,
     id_map: utils.IdMap,
-) -> sub_graph_return:
+    subgraph_cache: subgraph_cache_type,
+) -> sub_graph_builder:
     """
     Expand a JaxprEqn into a computation graph/
 
+    If the jaxpr of the function has already been expanded
+    the cached subgraph is copied rather than rebuilt.
+
     Parameters
     ----------
     eqn: jax._src.core.JaxprEqn
@@ -372,78 +440,90 @@ def expand_non_primitive(
         argument/variable nodes on the generated graph
     id_map: IdMap
         Node id to label map
+    subgraph_cache: dict
+        Map from jaxpr ids to previously generated subgraphs
+        and their ids
 
     Returns
     -------
-    (
-        typing.Union[pydot.Node, pydot.Subgraph],
-        typing.List[pydot.Edge],
-        typing.List[pydot.Node],
-        typing.List[pydot.Edge],
-        int
-    )
-        Tuple containing:
-            - Node representing the function
-            - List of edges that will connect a parent graph to the
-              arguments of the function
-            - List of nodes that should be added to a parent graph (i.e.
-              outputs of this graph)
-            - List of edges connecting the outputs of this node to
-              parent graph
-            - Updated incremented integer used to get unique node ids
+    sub_graph_builder
+        Generator that yields the sub-eqns it requires to be
+        expanded (and is sent the corresponding results), and
+        returns the `SubGraphResult` of the function subgraph
     """
+    jaxpr = eqn.params["jaxpr"].jaxpr
     graph_name = eqn.params["name"] if "name" in eqn.params else eqn.primitive.name
     graph_id = f"{graph_name}_{n}"
     n = n + 1
 
-    graph = pydot.Subgraph(
+    literal_nodes = _get_literal_nodes(eqn.invars, f"{parent_id}_", show_avals, id_map)
+
+    if id(jaxpr) in subgraph_cache:
+        # The function has already been expanded, so copy that subgraph
+        # and connect it to the arguments/outputs of this eqn
+        template, template_id = subgraph_cache[id(jaxpr)]
+        argument_edges = graph_utils.get_argument_edges(
+            template_id, parent_id, jaxpr.invars, eqn.invars
+        )
+        out_edges, out_nodes = graph_utils.get_output_edges(
+            template_id,
+            parent_id,
+            jaxpr.invars,
+            jaxpr.outvars,
+            eqn.outvars,
+            show_avals,
+            id_map,
+        )
+        graph, argument_edges, out_edges = _clone_cached(
+            template, graph_id, argument_edges, out_edges
+        )
+        return SubGraphResult(
+            graph, True, argument_edges, literal_nodes + out_nodes, out_edges, n
+        )
+
+    graph = graph_utils.new_subgraph(
         f"cluster_{graph_id}",
-        rank="same",
-        label=graph_name,
-        **styling.GRAPH_STYLING,
+        {"rank": "same", "label": graph_name, **styling.GRAPH_STYLING},
     )
 
     argument_nodes, argument_edges = graph_utils.get_arguments(
         graph_id,
         parent_id,
-        eqn.params["jaxpr"].jaxpr.constvars,
-        eqn.params["jaxpr"].jaxpr.invars,
+        jaxpr.constvars,
+        jaxpr.invars,
         eqn.invars,
         show_avals,
         id_map,
     )
-    graph.add_subgraph(argument_nodes)
+    graph_utils.add_subgraph(graph, argument_nodes)
 
-    for sub_eqn in eqn.params["jaxpr"].jaxpr.eqns:
-        sub_graph, in_edges, out_nodes, out_edges, n = get_sub_graph(
-            sub_eqn, graph_id, n, collapse_primitives, show_avals, id_map
-        )
-        if isinstance(sub_graph, pydot.Subgraph):
-            graph.add_subgraph(sub_graph)
+    for sub_eqn in jaxpr.eqns:
+        eqn_result = yield sub_eqn, graph_id, n
+        sub_graph, is_subgraph, in_edges, out_nodes, out_edges, n = eqn_result
+        if is_subgraph:
+            graph_utils.add_subgraph(graph, sub_graph)
         else:
             graph.add_node(sub_graph)
-        for edge in in_edges:
-            graph.add_edge(edge)
-        for node in out_nodes:
-            graph.add_node(node)
-        for edge in out_edges:
-            graph.add_edge(edge)
+        graph_utils.bulk_add(graph, out_nodes, in_edges + out_edges)
 
     output_nodes, out_edges, out_nodes, id_edges = graph_utils.get_outputs(
         graph_id,
         parent_id,
-        eqn.params["jaxpr"].jaxpr.invars,
-        eqn.params["jaxpr"].jaxpr.outvars,
+        jaxpr.invars,
+        jaxpr.outvars,
         eqn.outvars,
         show_avals,
         id_map,
     )
 
-    graph.add_subgraph(output_nodes)
-    for edge in id_edges:
-        graph.add_edge(edge)
+    graph_utils.add_subgraph(graph, output_nodes)
+    graph_utils.bulk_add(graph, [], id_edges)
+
+    subgraph_cache[id(jaxpr)] = (graph, graph_id)
 
-    return graph, argument_edges, out_nodes, out_edges, n
+    return SubGraphResult(
+        graph, True, argument_edges, literal_nodes + out_nodes, out_edges, n
+    )
 
 
 def get_scan(
@@ -453,37 +533,116 @@ def get_scan(
     collapse_primitives: bool,
     show_avals: bool,
     id_map: utils.IdMap,
-) -> sub_graph_return:
+    subgraph_cache: subgraph_cache_type,
+) -> sub_graph_builder:
+    """
+    Generate a subgraph representing a scan
+
+    If a scan over the same body, with the same arguments
+    (and literal values), has already been expanded the
+    cached subgraph is copied rather than rebuilt.
+
+    Parameters
+    ----------
+    eqn: jax._src.core.JaxprEqn
+        JaxprEqn of the scan
+    parent_id: str
+        ID of the parent graph to this eqn
+    n: int
+        Integer used to generate unique ids for nodes, incremented
+        as new nodes are added
+    collapse_primitives: bool
+        If `True` a scan body consisting of only primitive
+        functions is collapsed into a single node
+    show_avals: bool
+        If `True` the type of the data is shown on
+        argument/variable nodes on the generated graph
+    id_map: IdMap
+        Node id to label map
+    subgraph_cache: dict
+        Map from jaxpr ids to previously generated subgraphs
+        and their ids
+
+    Returns
+    -------
+    sub_graph_builder
+        Generator that yields the sub-eqns it requires to be
+        expanded (and is sent the corresponding results), and
+        returns the `SubGraphResult` of the scan subgraph
+    """
 
     graph_name = "scan"
     graph_id = f"{graph_name}_{n}"
     n = n + 1
 
-    graph = pydot.Subgraph(
+    jaxpr = eqn.params["jaxpr"].jaxpr
+    # Literal arguments are drawn inside the scan subgraph
+    literal_labels = tuple(
+        utils.get_node_label(var, show_avals, id_map)
+        if isinstance(var, jax_core.Literal)
+        else None
+        for var in eqn.invars
+    )
+    cache_key = (
+        id(eqn.params["jaxpr"]),
+        eqn.params["num_consts"],
+        eqn.params["num_carry"],
+        literal_labels,
+    )
+
+    if cache_key in subgraph_cache:
+        # The same scan has already been expanded, so copy that
+        # subgraph and connect it to the arguments/outputs of this eqn
+        template, template_id = subgraph_cache[cache_key]
+        args = [
+            (var, p_var)
+            for var, p_var in zip(jaxpr.invars, eqn.invars)
+            if not isinstance(p_var, jax_core.Literal)
+        ]
+        argument_edges = graph_utils.get_argument_edges(
+            template_id,
+            parent_id,
+            [var for var, _ in args],
+            [p_var for _, p_var in args],
+        )
+        out_edges, out_nodes = graph_utils.get_output_edges(
+            template_id,
+            parent_id,
+            jaxpr.invars,
+            jaxpr.outvars,
+            eqn.outvars,
+            show_avals,
+            id_map,
+        )
+        graph, argument_edges, out_edges = _clone_cached(
+            template, graph_id, argument_edges, out_edges
+        )
+        return SubGraphResult(graph, True, argument_edges, out_nodes, out_edges, n)
+
+    graph = graph_utils.new_subgraph(
         f"cluster_{graph_id}",
-        rank="same",
-        label=graph_name,
-        **styling.GRAPH_STYLING,
+        {"rank": "same", "label": graph_name, **styling.GRAPH_STYLING},
     )
 
     argument_nodes, argument_edges = graph_utils.get_scan_arguments(
         graph_id,
         parent_id,
-        eqn.params["jaxpr"].jaxpr.invars,
+        jaxpr.invars,
         eqn.invars,
         eqn.params["num_consts"],
         eqn.params["num_carry"],
         show_avals,
         id_map,
     )
-    graph.add_subgraph(argument_nodes)
+    graph_utils.add_subgraph(graph, argument_nodes)
 
-    out_var_keys = set(f"{graph_id}_{id(v)}" for v in eqn.params["jaxpr"].jaxpr.outvars)
-    eqns = eqn.params["jaxpr"].jaxpr.eqns
+    out_var_keys = set(f"{graph_id}_{id(v)}" for v in jaxpr.outvars)
+    eqns = jaxpr.eqns
 
     body_graph_id = f"cluster_{graph_id}_body"
+    body_contains_non_primitives = utils.contains_non_primitives_jaxpr(jaxpr)
 
-    if collapse_primitives and not utils.contains_non_primitives(eqns):
+    if collapse_primitives and not body_contains_non_primitives:
         body_in = set()
         body_out = set()
 
@@ -491,65 +650,58 @@ def get_scan(
             body_in.update([id(v) for v in sub_eqn.invars])
             body_out.update([id(v) for v in sub_eqn.outvars])
 
-        parent_in = set(id(v) for v in eqn.params["jaxpr"].jaxpr.invars)
-        parent_out = set(id(v) for v in eqn.params["jaxpr"].jaxpr.outvars)
+        parent_in = set(id(v) for v in jaxpr.invars)
+        parent_out = set(id(v) for v in jaxpr.outvars)
 
         body_in = body_in.intersection(parent_in)
         body_out = body_out.intersection(parent_out)
 
-        body_graph = pydot.Node(
-            name=graph_id,
-            label="body",
-            **styling.FUNCTION_NODE_STYLING,
+        body_graph, body_in_edges, body_out_edges = graph_utils.get_collapsed_node(
+            graph_id,
+            "body",
+            [f"{graph_id}_{v}" for v in body_in],
+            [f"{graph_id}_{v}" for v in body_out],
         )
-        graph.add_node(body_graph)
-
-        for v in body_in:
-            graph.add_edge(pydot.Edge(f"{graph_id}_{v}", graph_id))
-        for v in body_out:
-            graph.add_edge(pydot.Edge(graph_id, f"{graph_id}_{v}"))
+        graph_utils.bulk_add(graph, [body_graph], body_in_edges + body_out_edges)
     else:
-        body_graph = pydot.Subgraph(
+        body_graph = graph_utils.new_subgraph(
             body_graph_id,
-            rank="same",
-            label="body",
-            **styling.GRAPH_STYLING,
+            {"rank": "same", "label": "body", **styling.GRAPH_STYLING},
         )
 
         for sub_eqn in eqns:
-            sub_graph, in_edges, out_nodes, out_edges, n = get_sub_graph(
-                sub_eqn, graph_id, n, collapse_primitives, show_avals, id_map
-            )
-            if isinstance(sub_graph, pydot.Subgraph):
-                body_graph.add_subgraph(sub_graph)
+            eqn_result = yield sub_eqn, graph_id, n
+            sub_graph, is_subgraph, in_edges, out_nodes, out_edges, n = eqn_result
+            if is_subgraph:
+                graph_utils.add_subgraph(body_graph, sub_graph)
             else:
                 body_graph.add_node(sub_graph)
-            for edge in in_edges:
-                graph.add_edge(edge)
-            for node in out_nodes:
-                if not node.get_name() in out_var_keys:
-                    body_graph.add_node(node)
-            for edge in out_edges:
-                graph.add_edge(edge)
+            graph_utils.bulk_add(graph, [], in_edges + out_edges)
+            graph_utils.bulk_add(
+                body_graph,
+                [node for node in out_nodes if node.get_name() not in out_var_keys],
+                [],
+            )
 
-        graph.add_subgraph(body_graph)
+        graph_utils.add_subgraph(graph, body_graph)
 
     output_nodes, out_edges, out_nodes, id_edges = graph_utils.get_scan_outputs(
         graph_id,
         parent_id,
-        eqn.params["jaxpr"].jaxpr.invars,
-        eqn.params["jaxpr"].jaxpr.outvars,
+        jaxpr.invars,
+        jaxpr.outvars,
         eqn.outvars,
         eqn.params["num_carry"],
         show_avals,
         id_map,
     )
 
-    graph.add_subgraph(output_nodes)
-    for edge in id_edges:
-        graph.add_edge(edge)
+    graph_utils.add_subgraph(graph, output_nodes)
+    graph_utils.bulk_add(graph, [], id_edges)
 
-    return graph, argument_edges, out_nodes, out_edges, n
+    subgraph_cache[cache_key] = (graph, graph_id)
+
+    return SubGraphResult(graph, True, argument_edges, out_nodes, out_edges, n)
 
 
 def get_while_branch(
@@ -562,37 +714,95 @@ def get_while_branch(
     show_avals: bool,
     collapse_primitives: bool,
     id_map: utils.IdMap,
-) -> typing.Tuple[
-    typing.Union[pydot.Subgraph, pydot.Node],
-    typing.List[pydot.Edge],
-    typing.List[pydot.Edge],
-    int,
-]:
+    subgraph_cache: subgraph_cache_type,
+) -> sub_graph_builder:
+    """
+    Generate a subgraph, or collapsed node, representing the
+    cond or body function of a while loop
+
+    If the same function has already been expanded as the
+    cond/body of a while loop, the cached subgraph is copied
+    rather than rebuilt.
+
+    Parameters
+    ----------
+    jaxpr: jax._src.core.Jaxpr
+        Jaxpr of the cond/body function
+    parent_id: str
+        ID of the while loop subgraph
+    parent_args: List[jax._src.core.Var]
+        Variables of the while loop passed as arguments
+        to the function
+    parent_outvars: List[jax._src.core.Var]
+        Output variables of the while loop
+    label: str
+        Label of the function, also used for its ID
+    n: int
+        Integer used to generate unique ids for nodes, incremented
+        as new nodes are added
+    show_avals: bool
+        If `True` the type of the data is shown on
+        argument/variable nodes on the generated graph
+    collapse_primitives: bool
+        If `True` a function consisting of only primitive
+        functions is collapsed into a single node
+    id_map: IdMap
+        Node id to label map
+    subgraph_cache: dict
+        Map from jaxpr ids to previously generated subgraphs
+        and their ids
+
+    Returns
+    -------
+    sub_graph_builder
+        Generator that yields the sub-eqns it requires to be
+        expanded (and is sent the corresponding results), and
+        returns the `SubGraphResult` of the function (which
+        has no output nodes)
+    """
     graph_id = f"cluster_{parent_id}_{label}"
 
-    if collapse_primitives and not utils.contains_non_primitives(jaxpr.eqns):
-        graph = pydot.Node(
-            name=graph_id,
-            label=label,
-            **styling.FUNCTION_NODE_STYLING,
+    if collapse_primitives and not utils.contains_non_primitives_jaxpr(jaxpr):
+        parent_prefix = f"{parent_id}_"
+        # Unused (dropped) arguments are not drawn
+        in_ids = [
+            parent_prefix + str(id(p_var))
+            for var, p_var in zip(jaxpr.invars, parent_args)
+            if not isinstance(var, (jax_core.DropVar, jax_core.Literal))
+        ]
+        out_ids = [
+            parent_prefix + str(id(p_var))
+            for var, p_var in zip(jaxpr.outvars, parent_outvars)
+            if not isinstance(var, jax_core.DropVar)
+        ]
+        graph, arg_edges, out_edges = graph_utils.get_collapsed_node(
+            graph_id, label, in_ids, out_ids
+        )
+
+        return SubGraphResult(graph, False, arg_edges, [], out_edges, n)
+
+    cache_key = (id(jaxpr), label)
+
+    if cache_key in subgraph_cache:
+        # The function has already been expanded, so copy that subgraph
+        # and connect it to the arguments/outputs of this loop
+        template, template_id = subgraph_cache[cache_key]
+        arg_edges = graph_utils.get_argument_edges(
+            template_id, parent_id, jaxpr.invars, parent_args
+        )
+        out_edges, _ = graph_utils.get_output_edges(
+            template_id,
+            parent_id,
+            jaxpr.invars,
+            jaxpr.outvars,
+            parent_outvars,
+            show_avals,
+            id_map,
         )
-        arg_edges = list()
-        out_edges = list()
-
-        for (var, p_var) in zip(jaxpr.invars, parent_args):
-            # TODO: What does the underscore mean?
-            if str(var)[-1] == "_":
-                continue
-            is_literal = isinstance(var, jax_core.Literal)
-            if not is_literal:
-                arg_edges.append(pydot.Edge(f"{parent_id}_{id(p_var)}", graph_id))
-
-        for (var, p_var) in zip(jaxpr.outvars, parent_outvars):
-            if isinstance(var, jax_core.DropVar):
-                continue
-            out_edges.append(pydot.Edge(graph_id, f"{parent_id}_{id(p_var)}"))
-
-        return graph, arg_edges, out_edges, n
+        graph, arg_edges, out_edges = _clone_cached(
+            template, parent_id, arg_edges, out_edges
+        )
+        return SubGraphResult(graph, True, arg_edges, [], out_edges, n)
     else:
         graph = graph_utils.get_subgraph(graph_id, label)
         arg_nodes, outer_arg_edges = graph_utils.get_arguments(
@@ -604,26 +814,16 @@ def get_while_branch(
             show_avals,
             id_map,
         )
-        graph.add_subgraph(arg_nodes)
+        graph_utils.add_subgraph(graph, arg_nodes)
 
         for eqn in jaxpr.eqns:
-            (
-                sub_graph,
-                arg_edges,
-                out_nodes,
-                out_edges,
-                n,
-            ) = get_sub_graph(eqn, graph_id, n, collapse_primitives, show_avals, id_map)
-            if isinstance(sub_graph, pydot.Subgraph):
-                graph.add_subgraph(sub_graph)
+            eqn_result = yield eqn, graph_id, n
+            sub_graph, is_subgraph, arg_edges, out_nodes, out_edges, n = eqn_result
+            if is_subgraph:
+                graph_utils.add_subgraph(graph, sub_graph)
             else:
                 graph.add_node(sub_graph)
-            for edge in arg_edges:
-                graph.add_edge(edge)
-            for node in out_nodes:
-                graph.add_node(node)
-            for edge in out_edges:
-                graph.add_edge(edge)
+            graph_utils.bulk_add(graph, out_nodes, arg_edges + out_edges)
 
         out_nodes, outer_out_edges, _, id_edges = graph_utils.get_outputs(
             graph_id,
@@ -634,11 +834,12 @@ def get_while_branch(
             show_avals,
             id_map,
         )
-        graph.add_subgraph(out_nodes)
-        for e in id_edges:
-            graph.add_edge(e)
+        graph_utils.add_subgraph(graph, out_nodes)
+        graph_utils.bulk_add(graph, [], id_edges)
 
-        return graph, outer_arg_edges, outer_out_edges, n
+        subgraph_cache[cache_key] = (graph, graph_id)
+
+        return SubGraphResult(graph, True, outer_arg_edges, [], outer_out_edges, n)
 
 
 def get_while(
@@ -648,7 +849,39 @@ def get_while(
     collapse_primitives: bool,
     show_avals: bool,
     id_map: utils.IdMap,
-) -> sub_graph_return:
+    subgraph_cache: subgraph_cache_type,
+) -> sub_graph_builder:
+    """
+    Generate a subgraph representing a while loop
+
+    Parameters
+    ----------
+    eqn: jax._src.core.JaxprEqn
+        JaxprEqn of the while loop
+    parent_id: str
+        ID of the parent graph to this eqn
+    n: int
+        Integer used to generate unique ids for nodes, incremented
+        as new nodes are added
+    collapse_primitives: bool
+        If `True` cond/body functions consisting of only primitive
+        functions are collapsed into single nodes
+    show_avals: bool
+        If `True` the type of the data is shown on
+        argument/variable nodes on the generated graph
+    id_map: IdMap
+        Node id to label map
+    subgraph_cache: dict
+        Map from jaxpr ids to previously generated subgraphs
+        and their ids
+
+    Returns
+    -------
+    sub_graph_builder
+        Generator that yields the sub-eqns it requires to be
+        expanded (and is sent the corresponding results), and
+        returns the `SubGraphResult` of the while loop subgraph
+    """
 
     while_graph_id = f"{parent_id}_while_{n}"
     while_graph = graph_utils.get_subgraph(f"cluster_{while_graph_id}", "while")
@@ -660,19 +893,29 @@ def get_while(
     body_consts = eqn.invars[n_cond_const : n_cond_const + n_body_const]
     init_carry = eqn.invars[n_cond_const + n_body_const :]
 
-    arg_edges = list()
-    out_edges = list()
+    parent_prefix = f"{parent_id}_"
+    while_prefix = f"{while_graph_id}_"
+    in_ids = [str(id(var)) for var in eqn.invars]
+    out_ids = [str(id(var)) for var in eqn.outvars]
 
-    for var in eqn.invars:
-        arg_id = f"{while_graph_id}_{id(var)}"
-        is_literal = isinstance(var, jax_core.Literal)
-        while_graph.add_node(
-            graph_utils.get_arg_node(arg_id, var, show_avals, is_literal, id_map)
+    arg_nodes = [
+        graph_utils.get_arg_node(
+            while_prefix + var_id,
+            var,
+            show_avals,
+            isinstance(var, jax_core.Literal),
+            id_map,
         )
-        if not is_literal:
-            arg_edges.append(pydot.Edge(f"{parent_id}_{id(var)}", arg_id))
-
-    cond_graph, cond_arg_edges, _, n = get_while_branch(
+        for var, var_id in zip(eqn.invars, in_ids)
+    ]
+    arg_edges = [
+        graph_utils.new_edge(parent_prefix + var_id, while_prefix + var_id)
+        for var, var_id in zip(eqn.invars, in_ids)
+        if not isinstance(var, jax_core.Literal)
+    ]
+    graph_utils.bulk_add(while_graph, arg_nodes, [])
+
+    cond_result = yield from get_while_branch(
         eqn.params["cond_jaxpr"].jaxpr,
         while_graph_id,
         cond_consts + init_carry,
@@ -682,65 +925,73 @@ def get_while(
         show_avals,
         collapse_primitives,
         id_map,
+        subgraph_cache,
     )
-    for e in cond_arg_edges:
-        while_graph.add_edge(e)
-
-    body_graph, body_arg_edges, body_out_edges, n = get_while_branch(
+    body_result = yield from get_while_branch(
         eqn.params["body_jaxpr"].jaxpr,
         while_graph_id,
         body_consts + init_carry,
         eqn.outvars,
         "body",
-        n,
+        cond_result.n,
         show_avals,
         collapse_primitives,
         id_map,
+        subgraph_cache,
+    )
+    n = body_result.n
+    graph_utils.bulk_add(
+        while_graph,
+        [],
+        cond_result.in_edges + body_result.in_edges + body_result.out_edges,
     )
-    for e in body_arg_edges:
-        while_graph.add_edge(e)
-    for e in body_out_edges:
-        while_graph.add_edge(e)
 
-    if isinstance(cond_graph, pydot.Subgraph):
-        while_graph.add_subgraph(cond_graph)
-    else:
-        while_graph.add_node(cond_graph)
-    if isinstance(body_graph, pydot.Subgraph):
-        while_graph.add_subgraph(body_graph)
-    else:
-        while_graph.add_node(body_graph)
+    for result in (cond_result, body_result):
+        if result.is_subgraph:
+            graph_utils.add_subgraph(while_graph, result.graph)
+        else:
+            while_graph.add_node(result.graph)
 
-    for var in eqn.outvars:
-        arg_id = f"{while_graph_id}_{id(var)}"
-        while_graph.add_node(graph_utils.get_out_node(arg_id, var, show_avals, id_map))
-        if not isinstance(var, jax_core.DropVar):
-            out_edges.append(pydot.Edge(arg_id, f"{parent_id}_{id(var)}"))
+    out_nodes = [
+        graph_utils.get_out_node(while_prefix + var_id, var, show_avals, id_map)
+        for var, var_id in zip(eqn.outvars, out_ids)
+    ]
+    out_edges = [
+        graph_utils.new_edge(while_prefix + var_id, parent_prefix + var_id)
+        for var, var_id in zip(eqn.outvars, out_ids)
+        if not isinstance(var, jax_core.DropVar)
+    ]
+    graph_utils.bulk_add(while_graph, out_nodes, [])
 
-    return while_graph, arg_edges, [], out_edges, n
+    return SubGraphResult(while_graph, True, arg_edges, [], out_edges, n)
 
 
-def get_sub_graph(
+# Builders of control flow primitives, keyed by primitive name
+_CONTROL_FLOW_BUILDERS = {
+    "cond": get_conditional,
+    "scan": get_scan,
+    "while": get_while,
+}
+
+
+def _visit(
     eqn: jax_core.JaxprEqn,
     parent_id: str,
     n: int,
     collapse_primitives: bool,
     show_avals: bool,
     id_map: utils.IdMap,
-) -> sub_graph_return:
+    subgraph_cache: subgraph_cache_type,
+) -> typing.Union[SubGraphResult, sub_graph_builder]:
     """
-    Generate a node/subgraph representing a function
-
-    The returned node/subgraph is conditional on the function
-    type. This function recursively walks nodes on the graph
-    of this function to generate sub-graphs of sub-functions
+    Generate a node, or a builder for the subgraph, representing a function
 
     Parameters
     ----------
     eqn: jax._src.core.JaxprEqn
         JaxprEqn of the function
     parent_id: str
-        ID of the
+        ID of the parent graph
     n: int
         Integer used to generate unique ids for nodes, incremented
         as new nodes are added
@@ -752,31 +1003,22 @@ def get_sub_graph(
         argument/variable nodes on the generated graph
     id_map: IdMap
         Node id to label map
+    subgraph_cache: dict
+        Map from jaxpr ids to previously generated subgraphs
+        and their ids
 
     Returns
     -------
-    (
-        typing.Union[pydot.Node, pydot.Subgraph],
-        typing.List[pydot.Edge],
-        typing.List[pydot.Node],
-        typing.List[pydot.Edge],
-        int
-    )
-        Tuple containing:
-            - Subgraph or node representing the function
-            - List of edges that will connect a parent graph to the
-              arguments of the function
-            - List of nodes that should be added to a parent graph (i.e.
-              outputs of this graph)
-            - List of edges connecting the outputs of this node to
-              parent graph
-            - Updated incremented integer used to get unique node ids
+    SubGraphResult | sub_graph_builder
+        Either the node representing the function, or a generator
+        that builds the subgraph of the function. The generator
+        yields the sub-eqns that it requires to be expanded, and is
+        sent the corresponding results.
     """
 
     if utils.is_not_primitive(eqn):
-        if (
-            utils.contains_non_primitives(eqn.params["jaxpr"].jaxpr.eqns)
-            or not collapse_primitives
+        if not collapse_primitives or utils.contains_non_primitives_jaxpr(
+            eqn.params["jaxpr"].jaxpr
         ):
             return expand_non_primitive(
                 eqn,
@@ -785,6 +1027,7 @@ def get_sub_graph(
                 collapse_primitives,
                 show_avals,
                 id_map,
+                subgraph_cache,
             )
         else:
             # Return a node representing a function
@@ -797,28 +1040,17 @@ def get_sub_graph(
                 id_map,
             )
     else:
-        if eqn.primitive.name == "cond":
-            # Return a conditional subgraph
-            return get_conditional(
-                eqn, parent_id, n, collapse_primitives, show_avals, id_map
-            )
-        elif eqn.primitive.name == "scan":
-            return get_scan(
-                eqn,
-                parent_id,
-                n,
-                collapse_primitives,
-                show_avals,
-                id_map,
-            )
-        elif eqn.primitive.name == "while":
-            return get_while(
+        builder = _CONTROL_FLOW_BUILDERS.get(eqn.primitive.name)
+        if builder is not None:
+            # Return a conditional/loop subgraph
+            return builder(
                 eqn,
                 parent_id,
                 n,
                 collapse_primitives,
                 show_avals,
                 id_map,
+                subgraph_cache,
             )
         else:
             # Return a primitive node
@@ -830,3 +1062,79 @@ def get_sub_graph(
                 True,
                 id_map,
             )
+
+
+def get_sub_graph(
+    eqn: jax_core.JaxprEqn,
+    parent_id: str,
+    n: int,
+    collapse_primitives: bool,
+    show_avals: bool,
+    id_map: utils.IdMap,
+) -> SubGraphResult:
+    """
+    Generate a node/subgraph representing a function
+
+    The returned node/subgraph is conditional on the function
+    type. Sub-functions are expanded by walking an explicit
+    stack of suspended subgraph builders (rather than recursing)
+    so deeply nested functions are not limited by the Python
+    recursion limit.
+
+    Parameters
+    ----------
+    eqn: jax._src.core.JaxprEqn
+        JaxprEqn of the function
+    parent_id: str
+        ID of the parent graph
+    n: int
+        Integer used to generate unique ids for nodes, incremented
+        as new nodes are added
+    collapse_primitives: bool
+        If `True` any subgraph only consisting of primitive
+        functions is collapsed into a single node
+    show_avals: bool
+        If `True` the type of the data is shown on
+        argument/variable nodes on the generated graph
+    id_map: IdMap
+        Node id to label map
+
+    Returns
+    -------
+    SubGraphResult
+        Subgraph or node representing the function, and the
+        nodes and edges connecting it to its parent graph
+    """
+    subgraph_cache = dict()
+    result = _visit(
+        eqn, parent_id, n, collapse_primitives, show_avals, id_map, subgraph_cache
+    )
+
+    if not isinstance(result, types.GeneratorType):
+        return result
+
+    stack = collections.deque([result])
+    result = None
+
+    while stack:
+        try:
+            sub_eqn, sub_parent_id, n = stack[-1].send(result)
+        except StopIteration as finished:
+            stack.pop()
+            result = finished.value
+            continue
+
+        result = _visit(
+            sub_eqn,
+            sub_parent_id,
+            n,
+            collapse_primitives,
+            show_avals,
+            id_map,
+            subgraph_cache,
+        )
+        if isinstance(result, types.GeneratorType):
+            stack.append(result)
+            result = None
+
+    return result
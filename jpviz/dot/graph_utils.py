@@ -6,6 +6,108 @@ from jax._src import core as jax_core
 from . import styling, utils
 
 
+def new_node(name: str, label: str, style: typing.Dict[str, str]) -> pydot.Node:
+    """
+    Create a pydot node
+
+    Equivalent to `pydot.Node(name=name, label=label, **style)`, but
+    builds the node's object dictionary directly, skipping the
+    attribute accessor methods pydot generates for every instance.
+
+    Parameters
+    ----------
+    name: str
+        Unique ID of the node
+    label: str
+        Label of the node
+    style: dict
+        Styling attributes of the node, copied into the
+        node's own attribute dictionary
+
+    Returns
+    -------
+    pydot.Node
+    """
+    node = pydot.Node.__new__(pydot.Node)
+    node.obj_dict = {
+        "attributes": {"label": label, **style},
+        "type": "node",
+        "parent_graph": None,
+        "parent_node_list": None,
+        "sequence": None,
+        "name": pydot.quote_if_necessary(name),
+        "port": None,
+    }
+    return node
+
+
+def new_edge(src: str, dst: str) -> pydot.Edge:
+    """
+    Create a pydot edge
+
+    Equivalent to `pydot.Edge(src, dst)`, but builds the edge's
+    object dictionary directly, skipping the attribute accessor
+    methods pydot generates for every instance.
+
+    Parameters
+    ----------
+    src: str
+        ID of the source node
+    dst: str
+        ID of the destination node
+
+    Returns
+    -------
+    pydot.Edge
+    """
+    edge = pydot.Edge.__new__(pydot.Edge)
+    edge.obj_dict = {
+        "points": (pydot.quote_if_necessary(src), pydot.quote_if_necessary(dst)),
+        "attributes": dict(),
+        "type": "edge",
+        "parent_graph": None,
+        "parent_edge_list": None,
+        "sequence": None,
+    }
+    return edge
+
+
+def new_subgraph(name: str, attributes: typing.Dict[str, typing.Any]) -> pydot.Subgraph:
+    """
+    Create a pydot subgraph
+
+    Equivalent to `pydot.Subgraph(name, **attributes)`, but builds
+    the subgraph's object dictionary directly, skipping the
+    attribute accessor methods pydot generates for every instance.
+
+    Parameters
+    ----------
+    name: str
+        Unique ID of the subgraph
+    attributes: dict
+        Attributes of the subgraph
+
+    Returns
+    -------
+    pydot.Subgraph
+    """
+    graph = pydot.Subgraph.__new__(pydot.Subgraph)
+    graph.obj_dict = {
+        "attributes": attributes,
+        "name": pydot.quote_if_necessary(name),
+        "type": "subgraph",
+        "strict": False,
+        "suppress_disconnected": False,
+        "simplify": False,
+        "current_child_sequence": 1,
+        "nodes": dict(),
+        "edges": dict(),
+        "subgraphs": dict(),
+        "parent_graph": graph,
+    }
+    return graph
+
+
 def get_arg_node(
     arg_id: str,
     var: typing.Union[jax_core.Var, jax_core.Literal],
@@ -35,11 +137,7 @@ def get_arg_node(
     pydot.Node
     """
     style = styling.LITERAL_STYLING if is_literal else styling.IN_ARG_STYLING
-    return pydot.Node(
-        name=arg_id,
-        label=utils.get_node_label(var, show_avals, id_map),
-        **style,
-    )
+    return new_node(arg_id, utils.get_node_label(var, show_avals, id_map), style)
 
 
 def get_const_node(
@@ -66,10 +164,8 @@ def get_const_node(
     -------
     pydot.Node
     """
-    return pydot.Node(
-        name=arg_id,
-        label=utils.get_node_label(var, show_avals, id_map),
-        **styling.CONST_ARG_STYLING,
+    return new_node(
+        arg_id, utils.get_node_label(var, show_avals, id_map), styling.CONST_ARG_STYLING
     )
 
 
@@ -94,10 +190,8 @@ def get_var_node(
     -------
     pydot.Node
     """
-    return pydot.Node(
-        name=var_id,
-        label=utils.get_node_label(var, show_avals, id_map),
-        **styling.VAR_STYLING,
+    return new_node(
+        var_id, utils.get_node_label(var, show_avals, id_map), styling.VAR_STYLING
     )
 
 
@@ -122,10 +216,8 @@ def get_out_node(
     -------
     pydot.Node
     """
-    return pydot.Node(
-        name=out_id,
-        label=utils.get_node_label(var, show_avals, id_map),
-        **styling.OUT_ARG_STYLING,
+    return new_node(
+        out_id, utils.get_node_label(var, show_avals, id_map), styling.OUT_ARG_STYLING
     )
 
 
@@ -144,14 +236,141 @@ def get_subgraph(graph_id: str, label: str) -> pydot.Subgraph:
     -------
     pydot.Subgraph
     """
-    return pydot.Subgraph(
-        graph_id,
-        label=label,
-        rank="same",
-        **styling.GRAPH_STYLING,
+    return new_subgraph(
+        graph_id, {"label": label, "rank": "same", **styling.GRAPH_STYLING}
     )
 
 
+def get_collapsed_node(
+    node_id: str,
+    label: str,
+    in_ids: typing.Iterable[str],
+    out_ids: typing.Iterable[str],
+) -> typing.Tuple[pydot.Node, typing.List[pydot.Edge], typing.List[pydot.Edge]]:
+    """
+    Get a single node representing a collapsed function along with
+    edges connecting it to its inputs and outputs
+
+    Parameters
+    ----------
+    node_id: str
+        Unique ID of the node
+    label: str
+        Label of the node
+    in_ids: Iterable[str]
+        IDs of the nodes connected to the inputs of the function
+    out_ids: Iterable[str]
+        IDs of the nodes connected to the outputs of the function
+
+    Returns
+    -------
+    (pydot.Node, List[pydot.Edge], List[pydot.Edge])
+        Node representing the function, and lists of the input
+        and output edges
+    """
+    node = new_node(node_id, label, styling.FUNCTION_NODE_STYLING)
+    in_edges = [new_edge(var_id, node_id) for var_id in in_ids]
+    out_edges = [new_edge(node_id, var_id) for var_id in out_ids]
+    return node, in_edges, out_edges
+
+
+def bulk_add(
+    graph: pydot.Graph, nodes: typing.List[pydot.Node], edges: typing.List[pydot.Edge]
+) -> None:
+    """
+    Add nodes and then edges to a graph
+
+    Equivalent to calling `add_node`/`add_edge` for each item,
+    but inserts directly into the graph's object dictionary,
+    skipping the per-item type and existing node checks.
+
+    Parameters
+    ----------
+    graph: pydot.Graph
+        Graph to add nodes and edges to
+    nodes: List[pydot.Node]
+        Nodes to add to the graph
+    edges: List[pydot.Edge]
+        Edges to add to the graph
+    """
+    graph_dict = graph.obj_dict
+    graph_nodes = graph_dict["nodes"]
+    graph_edges = graph_dict["edges"]
+    parent_graph = graph.get_parent_graph()
+    sequence = graph_dict["current_child_sequence"]
+
+    for node in nodes:
+        node_dict = node.obj_dict
+        graph_nodes.setdefault(node_dict["name"], []).append(node_dict)
+        node_dict["parent_graph"] = parent_graph
+        node_dict["sequence"] = sequence
+        sequence += 1
+
+    for edge in edges:
+        edge_dict = edge.obj_dict
+        graph_edges.setdefault(edge_dict["points"], []).append(edge_dict)
+        edge_dict["parent_graph"] = parent_graph
+        edge_dict["sequence"] = sequence
+        sequence += 1
+
+    graph_dict["current_child_sequence"] = sequence
+
+
+def add_subgraph(graph: pydot.Graph, subgraph: pydot.Subgraph) -> None:
+    """
+    Add a subgraph to a graph
+
+    Equivalent to `graph.add_subgraph(subgraph)`, but only sets
+    the parent graph of the subgraph itself rather than walking
+    all of its contents (which pydot repeats at every level of
+    nesting). The parent of the contents is set once the complete
+    graph has been built using `set_parent_graph`.
+
+    Parameters
+    ----------
+    graph: pydot.Graph
+        Graph to add the subgraph to
+    subgraph: pydot.Subgraph
+        Subgraph to add
+    """
+    graph_dict = graph.obj_dict
+    subgraph_dict = subgraph.obj_dict
+    graph_dict["subgraphs"].setdefault(subgraph_dict["name"], []).append(subgraph_dict)
+    subgraph_dict["sequence"] = graph_dict["current_child_sequence"]
+    subgraph_dict["parent_graph"] = graph.get_parent_graph()
+    graph_dict["current_child_sequence"] += 1
+
+
+def set_parent_graph(graph: pydot.Subgraph, parent_graph: pydot.Graph) -> None:
+    """
+    Set the parent graph of a subgraph and all of its contents
+
+    Equivalent to `graph.set_parent_graph(parent_graph)`, but walks
+    nested subgraphs using an explicit stack (rather than recursing)
+    so deeply nested graphs are not limited by the recursion limit.
+
+    Parameters
+    ----------
+    graph: pydot.Subgraph
+        Subgraph to update
+    parent_graph: pydot.Graph
+        Top-level graph containing the subgraph
+    """
+    to_visit = [graph.obj_dict]
+
+    while to_visit:
+        obj = to_visit.pop()
+        obj["parent_graph"] = parent_graph
+        for nodes in obj["nodes"].values():
+            for node in nodes:
+                node["parent_graph"] = parent_graph
+        for edges in obj["edges"].values():
+            for edge in edges:
+                edge["parent_graph"] = parent_graph
+        for sub_graphs in obj["subgraphs"].values():
+            to_visit.extend(sub_graphs)
+
+
 def get_arguments(
     graph_id: str,
     parent_id: str,
@@ -189,30 +408,70 @@ def get_arguments(
         edges that connect variables in the parent graph to
         the inputs of this subgraph.
     """
-    argument_nodes = pydot.Subgraph(
-        f"{graph_id}_args", rank="same", **styling.ARG_SUBGRAPH_STYLING
+    argument_nodes = new_subgraph(
+        f"{graph_id}_args", {"rank": "same", **styling.ARG_SUBGRAPH_STYLING}
     )
     argument_edges = list()
+    arg_nodes = list()
+
+    graph_prefix = f"{graph_id}_"
+    parent_prefix = f"{parent_id}_"
 
     for var in graph_consts:
-        arg_id = f"{graph_id}_{id(var)}"
-        argument_nodes.add_node(get_const_node(arg_id, var, show_avals, id_map))
+        arg_id = graph_prefix + str(id(var))
+        arg_nodes.append(get_const_node(arg_id, var, show_avals, id_map))
 
     for var, p_var in zip(graph_invars, parent_invars):
-        # TODO: What does the underscore mean?
-        if str(var)[-1] == "_":
+        # Unused (dropped) arguments are not drawn
+        if isinstance(var, jax_core.DropVar):
             continue
-        arg_id = f"{graph_id}_{id(var)}"
+        arg_id = graph_prefix + str(id(var))
         is_literal = isinstance(var, jax_core.Literal)
-        argument_nodes.add_node(
-            get_arg_node(arg_id, var, show_avals, is_literal, id_map)
-        )
+        arg_nodes.append(get_arg_node(arg_id, var, show_avals, is_literal, id_map))
         if not is_literal:
-            argument_edges.append(pydot.Edge(f"{parent_id}_{id(p_var)}", arg_id))
+            argument_edges.append(new_edge(parent_prefix + str(id(p_var)), arg_id))
 
+    bulk_add(argument_nodes, arg_nodes, [])
     return argument_nodes, argument_edges
 
 
+def get_argument_edges(
+    graph_id: str,
+    parent_id: str,
+    graph_invars: typing.List[jax_core.Var],
+    parent_invars: typing.List[jax_core.Var],
+) -> typing.List[pydot.Edge]:
+    """
+    Generate the edges connecting a parent graph to the arguments
+    of a subgraph, as returned by `get_arguments`, without
+    generating the argument nodes
+
+    Parameters
+    ----------
+    graph_id: str
+        ID of the subgraph that owns the arguments
+    parent_id: str
+        ID of the parent of the subgraph
+    graph_invars: List[jax._src.core.Var]
+        List of input variables to the subgraph
+    parent_invars: List[jax._src.core.Var]
+        List of the corresponding input variables from the parent subgraph
+
+    Returns
+    -------
+    typing.List[pydot.Edge]
+        Edges that connect variables in the parent graph
+        to the inputs of the subgraph
+    """
+    graph_prefix = f"{graph_id}_"
+    parent_prefix = f"{parent_id}_"
+    return [
+        new_edge(parent_prefix + str(id(p_var)), graph_prefix + str(id(var)))
+        for var, p_var in zip(graph_invars, parent_invars)
+        if not isinstance(var, (jax_core.DropVar, jax_core.Literal))
+    ]
+
+
 def get_scan_arguments(
     graph_id: str,
     parent_id: str,
@@ -253,25 +512,42 @@ def get_scan_arguments(
         edges that connect variables in the parent graph to
         the inputs of this subgraph.
     """
-    argument_nodes = pydot.Subgraph(
-        f"cluster_{graph_id}_args", rank="min", **styling.ARG_SUBGRAPH_STYLING
+    argument_nodes = new_subgraph(
+        f"cluster_{graph_id}_args", {"rank": "min", **styling.ARG_SUBGRAPH_STYLING}
     )
-    const_nodes = pydot.Subgraph(
-        f"cluster_{graph_id}_const", rank="same", label="init", style="dotted"
+    const_nodes = new_subgraph(
+        f"cluster_{graph_id}_const",
+        {"rank": "same", "label": "init", "style": "dotted"},
     )
-    carry_nodes = pydot.Subgraph(
-        f"cluster_{graph_id}_init", rank="same", label="consts", style="dotted"
+    carry_nodes = new_subgraph(
+        f"cluster_{graph_id}_init",
+        {"rank": "same", "label": "consts", "style": "dotted"},
     )
-    iterate_nodes = pydot.Subgraph(
-        f"cluster_{graph_id}_iter", rank="same", label="iterate", style="dotted"
+    iterate_nodes = new_subgraph(
+        f"cluster_{graph_id}_iter",
+        {"rank": "same", "label": "iterate", "style": "dotted"},
     )
     argument_edges = list()
+    literal_nodes = list()
+    literal_edges = list()
+    const_args = list()
+    carry_args = list()
+    iterate_args = list()
+    # Argument group of each input variable
+    buckets = (
+        [const_args] * n_const
+        + [carry_args] * n_carry
+        + [iterate_args] * (len(graph_invars) - n_const - n_carry)
+    )
+
+    graph_prefix = f"{graph_id}_"
+    parent_prefix = f"{parent_id}_"
 
     for i, (var, p_var) in enumerate(zip(graph_invars, parent_invars)):
-        # TODO: What does the underscore mean?
-        if str(var)[-1] == "_":
+        # Unused (dropped) arguments are not drawn
+        if isinstance(var, jax_core.DropVar):
             continue
-        arg_id = f"{graph_id}_{id(var)}"
+        arg_id = graph_prefix + str(id(var))
 
         var_is_literal = isinstance(var, jax_core.Literal)
         parent_is_literal = isinstance(p_var, jax_core.Literal)
@@ -279,30 +555,23 @@ def get_scan_arguments(
 
         if parent_is_literal:
             literal_id = f"{arg_id}_lit"
-            argument_nodes.add_node(
+            literal_nodes.append(
                 get_arg_node(literal_id, p_var, show_avals, True, id_map)
             )
-            argument_nodes.add_edge(pydot.Edge(literal_id, arg_id))
+            literal_edges.append(new_edge(literal_id, arg_id))
 
-        if i < n_const:
-            const_nodes.add_node(
-                get_arg_node(arg_id, var, show_avals, var_is_literal, id_map)
-            )
-        elif i < n_carry + n_const:
-            carry_nodes.add_node(
-                get_arg_node(arg_id, var, show_avals, var_is_literal, id_map)
-            )
-        else:
-            iterate_nodes.add_node(
-                get_arg_node(arg_id, var, show_avals, var_is_literal, id_map)
-            )
+        buckets[i].append(get_arg_node(arg_id, var, show_avals, var_is_literal, id_map))
 
         if not is_literal:
-            argument_edges.append(pydot.Edge(f"{parent_id}_{id(p_var)}", arg_id))
-
-    argument_nodes.add_subgraph(const_nodes)
-    argument_nodes.add_subgraph(carry_nodes)
-    argument_nodes.add_subgraph(iterate_nodes)
+            argument_edges.append(new_edge(parent_prefix + str(id(p_var)), arg_id))
+
+    bulk_add(argument_nodes, literal_nodes, literal_edges)
+    bulk_add(const_nodes, const_args, [])
+    bulk_add(carry_nodes, carry_args, [])
+    bulk_add(iterate_nodes, iterate_args, [])
+    add_subgraph(argument_nodes, const_nodes)
+    add_subgraph(argument_nodes, carry_nodes)
+    add_subgraph(argument_nodes, iterate_nodes)
     return argument_nodes, argument_edges
 
 
@@ -358,29 +627,90 @@ def get_outputs(
             - A list of edges that connect inputs directly to outputs
               in the case an argument is returned by the function
     """
-    out_graph = pydot.Subgraph(
-        f"{graph_id}_outs", rank="same", **styling.ARG_SUBGRAPH_STYLING
+    out_graph = new_subgraph(
+        f"{graph_id}_outs", {"rank": "same", **styling.ARG_SUBGRAPH_STYLING}
     )
     out_edges = list()
     out_nodes = list()
     id_edges = list()
-    in_var_set = set([str(x) for x in graph_invars])
+    graph_out_nodes = list()
+    in_var_set = {id(x) for x in graph_invars}
+
+    graph_prefix = f"{graph_id}_"
+    parent_prefix = f"{parent_id}_"
 
     for var, p_var in zip(graph_outvars, parent_outvars):
-        if str(var) in in_var_set:
-            arg_id = f"{graph_id}_{id(var)}_out"
-            id_edges.append(pydot.Edge(f"{graph_id}_{id(var)}", arg_id))
+        var_id = graph_prefix + str(id(var))
+        p_var_id = parent_prefix + str(id(p_var))
+        if id(var) in in_var_set:
+            arg_id = f"{var_id}_out"
+            id_edges.append(new_edge(var_id, arg_id))
         else:
-            arg_id = f"{graph_id}_{id(var)}"
-        out_graph.add_node(get_out_node(arg_id, var, show_avals, id_map))
-        out_edges.append(pydot.Edge(arg_id, f"{parent_id}_{id(p_var)}"))
-        out_nodes.append(
-            get_var_node(f"{parent_id}_{id(p_var)}", p_var, show_avals, id_map)
-        )
+            arg_id = var_id
+        graph_out_nodes.append(get_out_node(arg_id, var, show_avals, id_map))
+        out_edges.append(new_edge(arg_id, p_var_id))
+        out_nodes.append(get_var_node(p_var_id, p_var, show_avals, id_map))
 
+    bulk_add(out_graph, graph_out_nodes, [])
     return out_graph, out_edges, out_nodes, id_edges
 
 
+def get_output_edges(
+    graph_id: str,
+    parent_id: str,
+    graph_invars: typing.List[jax_core.Var],
+    graph_outvars: typing.List[jax_core.Var],
+    parent_outvars: typing.List[jax_core.Var],
+    show_avals: bool,
+    id_map: utils.IdMap,
+) -> typing.Tuple[typing.List[pydot.Edge], typing.List[pydot.Node]]:
+    """
+    Generate the edges and nodes connecting the outputs of a subgraph
+    to its parent graph, as returned by `get_outputs`, without
+    generating the output nodes of the subgraph
+
+    Parameters
+    ----------
+    graph_id: str
+        ID of the subgraph
+    parent_id: str
+        ID of the parent graph
+    graph_invars: List[jax._src.core.Var]
+        List of funtion input variables
+    graph_outvars: List[jax._src.core.Var]
+        List of output function variables
+    parent_outvars: List[jax._src.core.Var]
+        Corresponding list of variable from the parent
+        graph that are outputs from this graph
+    show_avals: bool
+        If `True` show the type in the node
+    id_map: IdMap
+        Node id to label map
+
+    Returns
+    -------
+    (typing.List[pydot.Edge], typing.List[pydot.Node])
+        Tuple containing a list of edges connecting to the parent
+        graph, and a list of variable nodes that should be added
+        to the parent graph
+    """
+    out_edges = list()
+    out_nodes = list()
+    in_var_set = {id(x) for x in graph_invars}
+
+    graph_prefix = f"{graph_id}_"
+    parent_prefix = f"{parent_id}_"
+
+    for var, p_var in zip(graph_outvars, parent_outvars):
+        var_id = graph_prefix + str(id(var))
+        p_var_id = parent_prefix + str(id(p_var))
+        arg_id = f"{var_id}_out" if id(var) in in_var_set else var_id
+        out_edges.append(new_edge(arg_id, p_var_id))
+        out_nodes.append(get_var_node(p_var_id, p_var, show_avals, id_map))
+
+    return out_edges, out_nodes
+
+
 def get_scan_outputs(
     graph_id: str,
     parent_id: str,
@@ -437,35 +767,127 @@ def get_scan_outputs(
             - A list of edges that connect inputs directly to outputs
               in the case an argument is returned by the function
     """
-    out_graph = pydot.Subgraph(
-        f"cluster_{graph_id}_outs", rank="same", **styling.ARG_SUBGRAPH_STYLING
+    out_graph = new_subgraph(
+        f"cluster_{graph_id}_outs", {"rank": "same", **styling.ARG_SUBGRAPH_STYLING}
     )
-    carry_nodes = pydot.Subgraph(
-        f"cluster_{graph_id}_carry", rank="same", label="carry", style="dotted"
+    carry_nodes = new_subgraph(
+        f"cluster_{graph_id}_carry",
+        {"rank": "same", "label": "carry", "style": "dotted"},
     )
-    accumulate_nodes = pydot.Subgraph(
-        f"cluster_{graph_id}_acc", rank="same", label="accumulate", style="dotted"
+    accumulate_nodes = new_subgraph(
+        f"cluster_{graph_id}_acc",
+        {"rank": "same", "label": "accumulate", "style": "dotted"},
     )
     out_edges = list()
     out_nodes = list()
     id_edges = list()
-    in_var_set = set([id(x) for x in graph_invars])
+    carry_outs = list()
+    accumulate_outs = list()
+    # Output group of each output variable
+    buckets = [carry_outs] * n_carry + [accumulate_outs] * (
+        len(graph_outvars) - n_carry
+    )
+    in_var_set = {id(x) for x in graph_invars}
+
+    graph_prefix = f"{graph_id}_"
+    parent_prefix = f"{parent_id}_"
 
     for i, (var, p_var) in enumerate(zip(graph_outvars, parent_outvars)):
+        var_id = graph_prefix + str(id(var))
+        p_var_id = parent_prefix + str(id(p_var))
         if id(var) in in_var_set:
-            arg_id = f"{graph_id}_{id(var)}_out"
-            id_edges.append(pydot.Edge(f"{graph_id}_{id(var)}", arg_id))
+            arg_id = f"{var_id}_out"
+            id_edges.append(new_edge(var_id, arg_id))
         else:
-            arg_id = f"{graph_id}_{id(var)}"
-        if i < n_carry:
-            carry_nodes.add_node(get_out_node(arg_id, var, show_avals, id_map))
-        else:
-            accumulate_nodes.add_node(get_out_node(arg_id, var, show_avals, id_map))
-        out_edges.append(pydot.Edge(arg_id, f"{parent_id}_{id(p_var)}"))
-        out_nodes.append(
-            get_var_node(f"{parent_id}_{id(p_var)}", p_var, show_avals, id_map)
-        )
-
-    out_graph.add_subgraph(carry_nodes)
-    out_graph.add_subgraph(accumulate_nodes)
+            arg_id = var_id
+        buckets[i].append(get_out_node(arg_id, var, show_avals, id_map))
+        out_edges.append(new_edge(arg_id, p_var_id))
+        out_nodes.append(get_var_node(p_var_id, p_var, show_avals, id_map))
+
+    bulk_add(carry_nodes, carry_outs, [])
+    bulk_add(accumulate_nodes, accumulate_outs, [])
+    add_subgraph(out_graph, carry_nodes)
+    add_subgraph(out_graph, accumulate_nodes)
     return out_graph, out_edges, out_nodes, id_edges
+
+
+def clone_subgraph(
+    graph: pydot.Subgraph,
+    suffix: typing.Optional[str],
+    edges: typing.List[pydot.Edge],
+) -> typing.Tuple[pydot.Subgraph, typing.List[pydot.Edge]]:
+    """
+    Copy a subgraph, giving all the nodes and subgraphs it contains new ids
+
+    Ids are made unique by appending a suffix, edges between nodes
+    of the subgraph are updated to refer to the renamed nodes. If
+    the suffix is `None` ids are left unchanged.
+
+    Parameters
+    ----------
+    graph: pydot.Subgraph
+        Subgraph to copy
+    suffix: str, optional
+        Suffix appended to the ids of the copied nodes/subgraphs
+    edges: List[pydot.Edge]
+        Edges connecting the subgraph to its parent graph, these
+        are copied to connect the copied subgraph
+
+    Returns
+    -------
+    (pydot.Subgraph, typing.List[pydot.Edge])
+        Tuple containing the copied subgraph and the
+        copied edges
+    """
+    names = set()
+    to_visit = [graph.obj_dict]
+
+    while to_visit:
+        obj = to_visit.pop()
+        names.add(obj["name"])
+        names.update(obj["nodes"])
+        for sub_graphs in obj["subgraphs"].values():
+            to_visit.extend(sub_graphs)
+
+    def rename(name: str) -> str:
+        if suffix is None or name not in names:
+            return name
+        if name.startswith('"'):
+            name = name[1:-1]
+        return pydot.quote_if_necessary(f"{name}_{suffix}")
+
+    def copy_item(obj: dict) -> dict:
+        obj = dict(obj)
+        obj["attributes"] = dict(obj["attributes"])
+        if obj["type"] == "node":
+            obj["name"] = rename(obj["name"])
+        else:
+            obj["points"] = tuple(rename(p) for p in obj["points"])
+        return obj
+
+    # Subgraphs are copied using an explicit stack (rather than
+    # recursing) so deeply nested graphs can be copied
+    graph_copy = dict(graph.obj_dict)
+    to_copy = [graph_copy]
+
+    while to_copy:
+        obj = to_copy.pop()
+        obj["attributes"] = dict(obj["attributes"])
+        obj["name"] = rename(obj["name"])
+        obj["nodes"] = {
+            rename(k): [copy_item(x) for x in v] for k, v in obj["nodes"].items()
+        }
+        obj["edges"] = {
+            tuple(rename(p) for p in k): [copy_item(x) for x in v]
+            for k, v in obj["edges"].items()
+        }
+        obj["subgraphs"] = {
+            rename(k): [dict(x) for x in v] for k, v in obj["subgraphs"].items()
+        }
+        for sub_graphs in obj["subgraphs"].values():
+            to_copy.extend(sub_graphs)
+
+    return (
+        pydot.Subgraph(obj_dict=graph_copy),
+        [pydot.Edge(obj_dict=copy_item(e.obj_dict)) for e in edges],
+    )
@@ -1,21 +1,37 @@
 import typing
+import weakref
 
 from jax._src import core as jax_core
 
+_CONTAINS_NON_PRIMITIVES = weakref.WeakKeyDictionary()
+_NON_PRIMITIVE_NAMES = frozenset(("cond", "scan", "while"))
+
 
 class IdMap:
+    __slots__ = (
+        "i",
+        "map",
+        "chars",
+        "n_chars",
+        "node_labels",
+        "aval_labels",
+        "literal_ids",
+    )
+
     def __init__(self):
         self.i = 0
         self.map = dict()
-        self.chars = [chr(i) for i in range(97, 123)]
+        self.chars = tuple(chr(i) for i in range(97, 123))
         self.n_chars = len(self.chars)
+        self.node_labels = dict()
+        self.aval_labels = dict()
+        self.literal_ids = set()
 
     def get_next_label(self, node_id: str) -> str:
         if node_id in self.map:
             return self.map[node_id]
         else:
-            i = self.i % self.n_chars
-            j = (self.i - i) // self.n_chars
+            j, i = divmod(self.i, self.n_chars)
             label = (j + 1) * self.chars[i]
             self.map[node_id] = label
             self.i += 1
@@ -28,6 +44,10 @@ def get_node_label(
     """
     Concatenate a variable name and its type.
 
+    Labels are cached in the `id_map`, so each variable's
+    label, and each distinct type, is only formatted once
+    per graph.
+
     Parameters
     ----------
     v: Var
@@ -42,17 +62,27 @@ def get_node_label(
     -------
     str
     """
+    key = (id(v), show_avals)
+    node_label = id_map.node_labels.get(key)
+
+    if node_label is not None:
+        return node_label
+
     if isinstance(v, jax_core.Literal):
-        if show_avals:
-            return f"{v}: {v.aval.str_short()}"
-        else:
-            return str(v)
+        node_label = str(v)
     else:
-        label = id_map.get_next_label(str(id(v)))
-        if show_avals:
-            return f"{label}: {v.aval.str_short()}"
-        else:
-            return label
+        node_label = id_map.get_next_label(str(id(v)))
+
+    if show_avals:
+        # Many variables share the same type, so format each type once
+        aval_label = id_map.aval_labels.get(v.aval)
+        if aval_label is None:
+            aval_label = v.aval.str_short()
+            id_map.aval_labels[v.aval] = aval_label
+        node_label = f"{node_label}: {aval_label}"
+
+    id_map.node_labels[key] = node_label
+    return node_label
 
 
 def is_not_primitive(x: jax_core.JaxprEqn) -> bool:
@@ -86,8 +116,29 @@ def contains_non_primitives(eqns: typing.List[jax_core.JaxprEqn]) -> bool:
         `True` if any of the sub-eqns are non-primitive
     """
     return any(
-        [
-            ("jaxpr" in e.params or e.primitive.name in {"cond", "scan", "while"})
-            for e in eqns
-        ]
+        "jaxpr" in e.params or e.primitive.name in _NON_PRIMITIVE_NAMES for e in eqns
     )
+
+
+def contains_non_primitives_jaxpr(jaxpr: jax_core.Jaxpr) -> bool:
+    """
+    Check if the sub-functions of a JaxPR contains only JAX primitives
+
+    Cached version of `contains_non_primitives`, results are
+    stored for as long as the jaxpr is alive.
+
+    Parameters
+    ----------
+    jaxpr: jax._src.core.Jaxpr
+        Jaxpr to check
+
+    Returns
+    -------
+    bool:
+        `True` if any of the sub-eqns are non-primitive
+    """
+    result = _CONTAINS_NON_PRIMITIVES.get(jaxpr)
+    if result is None:
+        result = contains_non_primitives(jaxpr.eqns)
+        _CONTAINS_NON_PRIMITIVES[jaxpr] = result
+    return result
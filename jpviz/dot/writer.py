@@ -0,0 +1,198 @@
+import io
+import typing
+
+import pydot
+
+
+def _format_attributes(attributes: dict) -> typing.List[str]:
+    """
+    Format node/edge attributes as DOT `key=value` strings
+
+    Parameters
+    ----------
+    attributes: dict
+        Pydot attribute dictionary
+
+    Returns
+    -------
+    List[str]
+        Formatted attributes, sorted by key
+    """
+    formatted = list()
+    for attr in sorted(attributes):
+        value = attributes[attr]
+        if value == "":
+            value = '""'
+        if value is not None:
+            formatted.append(f"{attr}={pydot.quote_if_necessary(value)}")
+        else:
+            formatted.append(attr)
+    return formatted
+
+
+def _format_node_ref(node: typing.Union[str, int]) -> str:
+    """
+    Format the name of an edge end-point, quoting any port
+
+    Parameters
+    ----------
+    node: str | int
+        Node name
+
+    Returns
+    -------
+    str
+    """
+    if not isinstance(node, str):
+        return str(node)
+    if node.startswith('"') and node.endswith('"'):
+        return node
+    port_idx = node.rfind(":")
+    if port_idx > 0 and node[0] == '"' and node[port_idx - 1] == '"':
+        return node
+    if port_idx > 0:
+        return (
+            f"{pydot.quote_if_necessary(node[:port_idx])}"
+            f":{pydot.quote_if_necessary(node[port_idx + 1:])}"
+        )
+    return node
+
+
+def _write_node(node_dict: dict, stream: typing.TextIO) -> None:
+    name = pydot.quote_if_necessary(node_dict["name"])
+    attributes = _format_attributes(node_dict["attributes"])
+    if name in ("graph", "node", "edge") and not attributes:
+        stream.write("\n")
+    elif attributes:
+        stream.write(f"{name} [{', '.join(attributes)}];\n")
+    else:
+        stream.write(f"{name};\n")
+
+
+def _write_edge(edge_dict: dict, arrow: str, stream: typing.TextIO) -> None:
+    src, dst = edge_dict["points"]
+    edge = f"{_format_node_ref(src)} {arrow} {_format_node_ref(dst)}"
+    attributes = _format_attributes(edge_dict["attributes"])
+    if attributes:
+        stream.write(f"{edge}  [{', '.join(attributes)}];\n")
+    else:
+        stream.write(f"{edge};\n")
+
+
+def _open_graph(graph_dict: dict, is_root: bool, stream: typing.TextIO) -> None:
+    if is_root and graph_dict.get("strict", None):
+        stream.write("strict ")
+    graph_type = graph_dict["type"]
+    if graph_type == "subgraph" and not graph_dict.get("show_keyword", True):
+        graph_type = ""
+    stream.write(f"{graph_type} {graph_dict['name']} {{\n")
+
+    attributes = graph_dict["attributes"]
+    for attr in sorted(attributes):
+        value = attributes[attr]
+        if value is not None:
+            if value == "":
+                value = '""'
+            stream.write(f"{attr}={pydot.quote_if_necessary(value)};\n")
+
+
+def _graph_contents(graph_dict: dict) -> typing.Iterator[dict]:
+    """
+    Iterate over the nodes, edges and subgraphs of a graph in insertion order
+
+    Parameters
+    ----------
+    graph_dict: dict
+        Pydot graph object dictionary
+
+    Returns
+    -------
+    Iterator[dict]
+        Object dictionaries of the graph contents
+    """
+    contents = list()
+    for key in ("edges", "nodes", "subgraphs"):
+        for objs in graph_dict[key].values():
+            contents.extend(objs)
+    contents.sort(key=lambda x: x["sequence"])
+    return iter(contents)
+
+
+def write_graph(graph_dict: dict, stream: typing.TextIO) -> None:
+    """
+    Write a pydot graph to a stream in the DOT language
+
+    Produces the same output as pydot's `to_string`, but
+    works directly from the object dictionaries of the
+    graph (rather than re-wrapping every item in a pydot
+    object) and walks subgraphs using an explicit stack
+    (rather than recursing).
+
+    Parameters
+    ----------
+    graph_dict: dict
+        Object dictionary of the pydot graph
+    stream: TextIO
+        Stream to write the DOT representation to
+    """
+    arrow = "->" if graph_dict["type"] == "digraph" else "--"
+
+    _open_graph(graph_dict, True, stream)
+    stack = [(graph_dict, _graph_contents(graph_dict), set())]
+
+    while stack:
+        current, contents, edges_done = stack[-1]
+        obj = next(contents, None)
+
+        if obj is None:
+            stack.pop()
+            # Subgraphs are followed by a blank line
+            stream.write("}\n\n" if stack else "}\n")
+        elif obj["type"] == "node":
+            if current.get("suppress_disconnected", False) and not any(
+                obj["name"] in points for points in current["edges"]
+            ):
+                continue
+            _write_node(obj, stream)
+        elif obj["type"] == "edge":
+            points = obj["points"]
+            if current.get("simplify", False):
+                if points in edges_done or (
+                    arrow == "--" and points[::-1] in edges_done
+                ):
+                    continue
+                edges_done.add(points)
+            _write_edge(obj, arrow, stream)
+        else:
+            _open_graph(obj, False, stream)
+            stack.append((obj, _graph_contents(obj), set()))
+
+
+class DotGraph(pydot.Dot):
+    """
+    Pydot graph with faster conversion to the DOT language
+
+    Behaves as a `pydot.Dot` graph, but `to_string` (used
+    by pydot when writing and rendering graphs) is
+    implemented by `write_graph`, and writing the graph
+    in the DOT language (i.e. the `raw` format) streams
+    directly to the file.
+    """
+
+    def to_string(self) -> str:
+        stream = io.StringIO()
+        write_graph(self.obj_dict, stream)
+        return stream.getvalue()
+
+    def write(
+        self,
+        path: str,
+        prog: typing.Optional[str] = None,
+        format: str = "raw",
+        encoding: typing.Optional[str] = None,
+    ) -> bool:
+        if format != "raw":
+            return super().write(path, prog=prog, format=format, encoding=encoding)
+        with io.open(path, mode="wt", encoding=encoding) as f:
+            write_graph(self.obj_dict, f)
+        return True
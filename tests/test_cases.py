@@ -1,8 +1,14 @@
+import re
+import sys
+
 import jax
+import jax._src.core as jax_core
 import jax.numpy as jnp
+import pydot
 import pytest
 
 import jpviz
+from jpviz import dot
 
 
 @jax.jit
@@ -58,6 +64,11 @@ def func8(arg1, arg2):
     )
 
 
+@jax.jit
+def func9(arg1, arg2):
+    return jax.lax.cond(arg1 >= 0.0, lambda a, b: a + b, lambda a, b: a - b, arg2, 2.0)
+
+
 @jax.jit
 def func10(arg, n):
     ones = jnp.ones(arg.shape)
@@ -77,6 +88,27 @@ def func11(arr, extra):
     return jax.lax.scan(body, 0.0, (arr, ones))
 
 
+@jax.jit
+def scale(arg, factor):
+    return arg * factor
+
+
+@jax.jit
+def func12(arg):
+    return scale(arg, 2.0) + scale(arg, 2.0)
+
+
+def scan_body(carry, x):
+    return carry + jnp.sin(x), carry
+
+
+@jax.jit
+def func13(x):
+    a = jax.lax.scan(scan_body, x[0], x)
+    b = jax.lax.scan(scan_body, x[1], x)
+    return a, b
+
+
 test_cases = [
     (func1, [jnp.zeros(8), jnp.ones(8)]),
     (func3, [jnp.zeros(8), jnp.ones(8)]),
@@ -84,6 +116,7 @@ test_cases = [
     (one_of_three, [1, 5.0]),
     (func7, [5.0]),
     (func8, [5.0, (jnp.zeros(1), 2.0)]),
+    (func9, [5.0, 2.0]),
     (func10, [jnp.ones(16), 5]),
     (func11, [jnp.ones(16), 5.0]),
 ]
@@ -93,3 +126,139 @@ test_cases = [
 @pytest.mark.parametrize("collapse_primitives", [True, False])
 def test_works(f, args, collapse_primitives):
     _ = jpviz.draw(f, collapse_primitives=collapse_primitives)(*args)
+
+
+@pytest.mark.parametrize("f, args", test_cases)
+@pytest.mark.parametrize("collapse_primitives", [True, False])
+def test_dot_string(f, args, collapse_primitives):
+    g = jpviz.draw(f, collapse_primitives=collapse_primitives)(*args)
+    assert g.to_string() == pydot.Dot.to_string(g)
+
+
+def test_repeat_draw():
+    args = [jnp.zeros(8), jnp.ones(8)]
+    g1 = jpviz.draw(func3, collapse_primitives=False)(*args)
+    g2 = jpviz.draw(func3, collapse_primitives=False)(*args)
+
+    assert g1.to_string() == g2.to_string()
+    # Repeated draws do not share graph contents
+    g1.get_subgraph_list()[0].obj_dict["nodes"].clear()
+    assert g1.to_string() != g2.to_string()
+
+
+def test_write_raw(tmp_path):
+    g = jpviz.draw(func3, collapse_primitives=False)(jnp.zeros(8), jnp.ones(8))
+    path = tmp_path / "graph.dot"
+    g.write_raw(str(path))
+
+    assert path.read_text() == pydot.Dot.to_string(g)
+
+
+def test_collapsed_branch_literal_args():
+    g = jpviz.draw(func9)(5.0, 2.0)
+    branch_in_edges = re.findall(r"-> \S+_branch_\d+;", g.to_string())
+    # Both arguments, including the literal, connect to both branches
+    assert len(branch_in_edges) == 4
+
+
+def _assert_edges_connect_nodes(dot_string):
+    nodes = set(re.findall(r"^(\S+) \[", dot_string, re.M))
+    edges = re.findall(r"^(\S+) -> (\S+);", dot_string, re.M)
+    assert all(src in nodes and dst in nodes for src, dst in edges)
+
+
+@pytest.mark.parametrize("collapse_primitives", [True, False])
+@pytest.mark.parametrize("f, args", test_cases)
+def test_edges_connect_nodes(f, args, collapse_primitives):
+    g = jpviz.draw(f, collapse_primitives=collapse_primitives)(*args)
+    _assert_edges_connect_nodes(g.to_string())
+
+
+def test_literal_function_args():
+    g = jpviz.draw(func12, collapse_primitives=False)(5.0)
+    dot_string = g.to_string()
+
+    _assert_edges_connect_nodes(dot_string)
+    # The literal shared by both calls is drawn once
+    assert dot_string.count('label="2.0') == 1
+
+
+def test_repeated_scan_body():
+    g = jpviz.draw(func13, collapse_primitives=False)(jnp.ones(4))
+    dot_string = g.to_string()
+
+    _assert_edges_connect_nodes(dot_string)
+    scans = re.findall(
+        r"^subgraph (cluster_scan_\d+(?:_scan_\d+)?) {", dot_string, re.M
+    )
+    # The second scan is copied from the first, with unique ids
+    assert len(scans) == 2
+    assert scans[1].startswith(f"{scans[0]}_scan_")
+    assert dot_string.count("label=sin") == 2
+
+
+def _all_nodes(graph):
+    nodes = graph.get_nodes()
+    for sub_graph in graph.get_subgraphs():
+        nodes.extend(_all_nodes(sub_graph))
+    return nodes
+
+
+def test_drawn_nodes_are_mutable():
+    # Both the first draws and repeated (cached) draws can be edited
+    for _ in range(3):
+        g = jpviz.draw(func1, collapse_primitives=False)(jnp.zeros(8), jnp.ones(8))
+        for node in _all_nodes(g):
+            node.set("color", "black")
+        assert "color=black, fontname=Courier, fontsize=10, label=sin" in g.to_string()
+
+
+def _nest(closed_jaxpr, depth):
+    # Wrap a jaxpr with a single jitted function call in further calls
+    # (tracing deeply nested jitted functions in JAX is very slow)
+    for _ in range(depth):
+        eqn = closed_jaxpr.eqns[0]
+        eqn = eqn.replace(params={**eqn.params, "jaxpr": closed_jaxpr})
+        jaxpr = closed_jaxpr.jaxpr.replace(eqns=[eqn])
+        closed_jaxpr = jax_core.ClosedJaxpr(jaxpr, closed_jaxpr.consts)
+    return closed_jaxpr
+
+
+def test_deep_nesting():
+    @jax.jit
+    def double(x):
+        return jnp.sin(x) * 2.0
+
+    jaxpr = _nest(jax.make_jaxpr(double)(1.0), 1499)
+
+    # Drawing, copying and writing the graph is not bounded by the
+    # recursion limit, including repeated (cached) draws
+    assert sys.getrecursionlimit() < 1500
+    for _ in range(3):
+        g = dot.draw_dot_graph(jaxpr, False, True)
+        assert g.to_string().count("subgraph cluster_") == 1500
+
+
+def test_drawn_subgraphs_detached():
+    dot._DRAWN_SUBGRAPHS.clear()
+    f = jpviz.draw(func1, collapse_primitives=False)
+
+    # Functions drawn once are not copied
+    f(jnp.zeros(8), jnp.ones(8))
+    assert list(dot._DRAWN_SUBGRAPHS.values()) == [None]
+
+    # The copy kept of repeatedly drawn functions does
+    # not reference the returned graphs
+    f(jnp.zeros(8), jnp.ones(8))
+    (template,) = dot._DRAWN_SUBGRAPHS.values()
+    assert template.get_parent_graph() is None
+    assert all(node.get_parent_graph() is None for node in _all_nodes(template))
+
+
+def test_drawn_subgraphs_bounded():
+    dot._DRAWN_SUBGRAPHS.clear()
+    for f, args in test_cases:
+        for show_avals in (True, False):
+            jpviz.draw(f, show_avals=show_avals)(*args)
+
+    assert len(dot._DRAWN_SUBGRAPHS) == dot._MAX_DRAWN_SUBGRAPHS
@@ -0,0 +1,153 @@
+import jax
+import pydot
+
+from jpviz.dot import graph_utils, utils
+
+
+def test_clone_subgraph():
+
+    g = pydot.Subgraph("cluster_a")
+    g.add_node(pydot.Node("a_1", label="x"))
+    g.add_node(pydot.Node("a_2", label="y"))
+    g.add_edge(pydot.Edge("a_1", "a_2"))
+    in_edge = pydot.Edge("b_1", "a_1")
+
+    clone, (clone_in_edge,) = graph_utils.clone_subgraph(g, "c", [in_edge])
+
+    assert clone.get_name() == "cluster_a_c"
+    assert sorted(clone.obj_dict["nodes"]) == ["a_1_c", "a_2_c"]
+    assert clone.get_node("a_1_c")[0].get("label") == "x"
+    assert list(clone.obj_dict["edges"]) == [("a_1_c", "a_2_c")]
+    assert clone_in_edge.obj_dict["points"] == ("b_1", "a_1_c")
+    # Original is unchanged
+    assert sorted(g.obj_dict["nodes"]) == ["a_1", "a_2"]
+
+
+def test_bulk_add():
+    def graph_items():
+        nodes = [pydot.Node("a", label="x"), pydot.Node("b"), pydot.Node("a")]
+        edges = [pydot.Edge("a", "b"), pydot.Edge("b", "a"), pydot.Edge("a", "b")]
+        return nodes, edges
+
+    expected = pydot.Dot(graph_type="digraph")
+    nodes, edges = graph_items()
+    for node in nodes:
+        expected.add_node(node)
+    for edge in edges:
+        expected.add_edge(edge)
+
+    g = pydot.Dot(graph_type="digraph")
+    graph_utils.bulk_add(g, *graph_items())
+
+    assert g.to_string() == expected.to_string()
+
+
+def test_new_node_and_edge():
+    style = {"shape": "box"}
+
+    node = graph_utils.new_node("12_3", "x", style)
+    expected_node = pydot.Node("12_3", label="x", **style)
+    assert node.obj_dict == expected_node.obj_dict
+    assert node.to_string() == expected_node.to_string()
+
+    edge = graph_utils.new_edge("12_3", "a")
+    expected_edge = pydot.Edge("12_3", "a")
+    assert edge.obj_dict == expected_edge.obj_dict
+
+
+def test_new_node_attributes():
+    style = {"shape": "box"}
+
+    a = graph_utils.new_node("a", "x", style)
+    b = graph_utils.new_node("b", "x", style)
+
+    # Nodes own their attributes, and can be modified independently
+    a.set("label", "y")
+    assert a.get("label") == "y"
+    assert b.get("label") == "x"
+    assert style == {"shape": "box"}
+
+
+def test_new_subgraph():
+    attributes = {"rank": "same", "label": "x"}
+
+    g = graph_utils.new_subgraph("cluster_a", attributes)
+    g.add_node(graph_utils.new_node("a_1", "y", {}))
+
+    expected = pydot.Subgraph("cluster_a", **attributes)
+    expected.add_node(pydot.Node("a_1", label="y"))
+
+    assert g.to_string() == expected.to_string()
+
+
+def test_get_collapsed_node():
+    node, in_edges, out_edges = graph_utils.get_collapsed_node(
+        "f_1", "f", ["a", "b"], ["c"]
+    )
+
+    assert node.get_name() == "f_1"
+    assert node.get("label") == "f"
+    assert [e.obj_dict["points"] for e in in_edges] == [("a", "f_1"), ("b", "f_1")]
+    assert [e.obj_dict["points"] for e in out_edges] == [("f_1", "c")]
+
+
+def test_add_subgraph():
+    g = graph_utils.new_subgraph("a", {})
+    inner = graph_utils.new_subgraph("b", {"label": "y"})
+    graph_utils.bulk_add(inner, [graph_utils.new_node("b_1", "x", {})], [])
+    graph_utils.add_subgraph(g, inner)
+    g.add_node(graph_utils.new_node("a_1", "z", {}))
+
+    expected = pydot.Subgraph("a")
+    expected_inner = pydot.Subgraph("b", label="y")
+    expected_inner.add_node(pydot.Node("b_1", label="x"))
+    expected.add_subgraph(expected_inner)
+    expected.add_node(pydot.Node("a_1", label="z"))
+
+    assert g.to_string() == expected.to_string()
+
+
+def test_set_parent_graph():
+    g = pydot.Dot()
+    inner = graph_utils.new_subgraph("a", {})
+    innermost = graph_utils.new_subgraph("b", {})
+    graph_utils.bulk_add(
+        innermost,
+        [graph_utils.new_node("b_1", "x", {})],
+        [graph_utils.new_edge("b_1", "b_2")],
+    )
+    graph_utils.add_subgraph(inner, innermost)
+    graph_utils.add_subgraph(g, inner)
+    graph_utils.set_parent_graph(inner, g)
+
+    assert innermost.get_parent_graph() is g
+    assert all(n.get_parent_graph() is g for n in innermost.get_nodes())
+    assert all(e.get_parent_graph() is g for e in innermost.get_edges())
+
+
+def test_argument_and_output_edges():
+    @jax.jit
+    def f(x, y):
+        return x + y, y
+
+    eqn = jax.make_jaxpr(lambda x: f(x, 2.0))(1.0).eqns[0]
+    jaxpr = eqn.params["jaxpr"].jaxpr
+    id_map = utils.IdMap()
+
+    def points(edges):
+        return [e.obj_dict["points"] for e in edges]
+
+    _, arg_edges = graph_utils.get_arguments(
+        "g", "p", jaxpr.constvars, jaxpr.invars, eqn.invars, True, id_map
+    )
+    edges = graph_utils.get_argument_edges("g", "p", jaxpr.invars, eqn.invars)
+    assert points(edges) == points(arg_edges)
+
+    _, out_edges, out_nodes, _ = graph_utils.get_outputs(
+        "g", "p", jaxpr.invars, jaxpr.outvars, eqn.outvars, True, id_map
+    )
+    edges, nodes = graph_utils.get_output_edges(
+        "g", "p", jaxpr.invars, jaxpr.outvars, eqn.outvars, True, id_map
+    )
+    assert points(edges) == points(out_edges)
+    assert [n.obj_dict for n in nodes] == [n.obj_dict for n in out_nodes]
@@ -1,3 +1,5 @@
+import jax
+
 from jpviz.dot import utils
 
 
@@ -12,3 +14,35 @@ def test_id_map():
     assert m.get_next_label("z") == "z"
     assert m.get_next_label("foo") == "aa"
     assert m.get_next_label("bar") == "bb"
+
+
+def test_contains_non_primitives():
+    @jax.jit
+    def inner(x):
+        return 2 * x
+
+    def outer(x):
+        return inner(x) + 1
+
+    primitive_jaxpr = jax.make_jaxpr(lambda x: 2 * x + 1)(1.0).jaxpr
+    nested_jaxpr = jax.make_jaxpr(outer)(1.0).jaxpr
+
+    assert not utils.contains_non_primitives(primitive_jaxpr.eqns)
+    assert utils.contains_non_primitives(nested_jaxpr.eqns)
+
+    for _ in range(2):
+        assert not utils.contains_non_primitives_jaxpr(primitive_jaxpr)
+        assert utils.contains_non_primitives_jaxpr(nested_jaxpr)
+
+
+def test_get_node_label():
+    jaxpr = jax.make_jaxpr(lambda x, y: x + y)(1.0, 2.0).jaxpr
+    x, y = jaxpr.invars
+    m = utils.IdMap()
+
+    assert utils.get_node_label(x, False, m) == "a"
+    assert utils.get_node_label(y, True, m) == f"b: {y.aval.str_short()}"
+    assert utils.get_node_label(x, True, m) == f"a: {x.aval.str_short()}"
+    assert utils.get_node_label(y, False, m) == "b"
+    # Both arguments share a type, which is only formatted once
+    assert len(m.aval_labels) == 1